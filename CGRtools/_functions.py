@@ -18,6 +18,7 @@
 #
 from itertools import product
 from sys import version_info
+from typing import Tuple
 
 
 # lazy itertools.product with diagonal combination precedence
@@ -67,6 +68,32 @@ def lazy_product(*args):
             yield tuple(p[x] for x, p in zip(ind, pools))
 
 
+def pack_varint(value: int, buffer: bytearray):
+    """
+    Append unsigned LEB128 encoded integer to buffer.
+    """
+    while value > 0x7f:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def unpack_varint(data, shift: int) -> Tuple[int, int]:
+    """
+    Decode unsigned LEB128 integer from given position. Return value and position of next byte.
+    """
+    value = o = 0
+    while True:
+        if shift >= len(data):
+            raise ValueError('truncated data')
+        b = data[shift]
+        shift += 1
+        value |= (b & 0x7f) << o
+        if b < 0x80:
+            return value, shift
+        o += 7
+
+
 if version_info[1] >= 8:
     tuple_hash = hash
 else:
@@ -100,4 +127,4 @@ else:
         return acc
 
 
-__all__ = ['lazy_product', 'tuple_hash']
+__all__ = ['lazy_product', 'tuple_hash', 'pack_varint', 'unpack_varint']
@@ -40,6 +40,7 @@ class Aromatize:
             N1C=CC2=NC=CC2=C1>>N1C=CC2=CN=CC=C12
         """
         atoms = self._atoms
+        self._thaw()  # bonds changed inplace
         bonds = self._bonds
         sh = self._hybridizations
         charges = self._charges
@@ -234,6 +235,7 @@ class Aromatize:
 
     def __fix_oxides(self: 'MoleculeContainer'):
         atoms = self._atoms
+        self._thaw()  # bonds changed inplace
         bonds = self._bonds
         atoms_order = self.atoms_order
         connected_components = [set(x) for x in self.connected_components]
@@ -263,6 +265,7 @@ class Aromatize:
         atoms = self._atoms
         charges = self._charges
         radicals = self._radicals
+        self._thaw()  # bonds changed inplace
         bonds = self._bonds
         hydrogens = self._hydrogens
 
@@ -440,6 +443,7 @@ class Aromatize:
         return rings, pyroles, double_bonded
 
     def __kekule_patch(self: 'MoleculeContainer', patch):
+        self._thaw()  # bonds changed inplace
         bonds = self._bonds
         atoms = set()
         for n, m, b in patch:
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from CachedMethods import cached_property
+from collections import Counter
+from typing import Dict, Optional
+from .._functions import tuple_hash
+
+
+fingerprint_size = 1024  # bits in folded fingerprint
+fingerprint_length = 4  # maximal number of bonds in linear paths
+
+
+class Fingerprints:
+    __slots__ = ()
+
+    @cached_property
+    def screening_fingerprint(self) -> int:
+        """
+        Linear paths and atoms counts based fingerprint folded into integer bitset.
+
+        Used for substructure screening: query can be substructure of molecule only if all bits of
+        query fingerprint exist in molecule fingerprint.
+        """
+        return self._screening_fingerprint({n: a.atomic_number for n, a in self._atoms.items()},
+                                           {n: {m: b.order for m, b in ms.items()} for n, ms in self._bonds.items()})
+
+    @staticmethod
+    def _screening_fingerprint(atoms: Dict[int, Optional[int]], bonds: Dict[int, Dict[int, Optional[int]]]) -> int:
+        """
+        Fingerprint of labeled graph. Atoms and bonds labeled with None are ignored.
+
+        :param atoms: atom number - atom label pairs
+        :param bonds: adjacency of bond labels
+        """
+        bits = set()
+        for a, c in Counter(x for x in atoms.values() if x is not None).items():
+            for i in range(1, c + 1):  # at least i atoms of given type
+                bits.add(tuple_hash((a, -i)) % fingerprint_size)
+
+        for n, a in atoms.items():
+            if a is None:
+                continue
+            bits.add(tuple_hash((a,)) % fingerprint_size)
+            stack = [(m, b, (a, b), {n}) for m, b in bonds[n].items() if b is not None]
+            while stack:
+                n, b, path, seen = stack.pop()
+                a = atoms[n]
+                if a is None:
+                    continue
+                path = (*path, a)
+                rev = path[::-1]
+                bits.add(tuple_hash(path if path < rev else rev) % fingerprint_size)
+                if len(seen) < fingerprint_length:
+                    seen = seen | {n}
+                    for m, b in bonds[n].items():
+                        if m not in seen and b is not None:
+                            stack.append((m, b, (*path, b), seen))
+
+        fingerprint = 0
+        for x in bits:
+            fingerprint |= 1 << x
+        return fingerprint
+
+
+__all__ = ['Fingerprints']
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 #
-#  Copyright 2018-2020 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  Copyright 2018-2021 Ramil Nugmanov <nougmanoff@protonmail.com>
 #  This file is part of CGRtools.
 #
 #  CGRtools is free software; you can redistribute it and/or modify
@@ -18,10 +18,91 @@
 #
 from abc import abstractmethod
 from CachedMethods import cached_property
-from collections import defaultdict
+from collections import Counter, defaultdict
+from importlib.util import find_spec
 from itertools import permutations
-from typing import Dict, Iterator, Any
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from .._functions import lazy_product
+from ..containers import molecule  # cyclic imports resolve
+from ..periodictable import AnyElement, Element, ListElement
+
+
+backend = 'python'
+
+if find_spec('numpy') and find_spec('numba'):
+    from numba import njit
+    from numpy import array, int64, uint8, zeros
+
+    @njit(cache=True)
+    def _get_mapping_numba(back, bonds, c_offsets, c_depths, c_bonds, atoms, offsets, neighbors, orders, groups,
+                           scope):
+        """
+        Depth-first search of query linear plan in target CSR adjacency.
+
+        :param back: depths of query atoms to which query atoms bonded
+        :param bonds: bitmasks of query bonds orders
+        :param c_offsets: query ring closures CSR offsets
+        :param c_depths: depths of closure atoms
+        :param c_bonds: bitmasks of closure bonds orders
+        :param atoms: query atoms to target atoms equality matrix
+        :param orders: bitmasks of target bonds orders
+        """
+        size = back.shape[0] - 1
+        targets = scope.shape[0]
+        path = zeros(size + 1, dtype=int64)
+        used = zeros(targets, dtype=uint8)
+        uniq = zeros(targets, dtype=uint8)
+        stack_atoms = zeros(targets * (size + 1), dtype=int64)
+        stack_depths = zeros(targets * (size + 1), dtype=int64)
+        top = 0
+        for n in range(targets):
+            if scope[n] and atoms[0, n]:
+                stack_atoms[top] = n
+                stack_depths[top] = 0
+                top += 1
+        length = 0
+        while top:
+            top -= 1
+            n = stack_atoms[top]
+            depth = stack_depths[top]
+            if depth == size:
+                path[depth] = n
+                yield path.copy()
+                continue
+            for i in range(depth, length):
+                used[path[i]] = 0
+            path[depth] = n
+            used[n] = 1
+            length = depth + 1
+
+            depth += 1
+            parent = path[back[depth]]
+            bond = bonds[depth]
+            for i in range(offsets[parent], offsets[parent + 1]):
+                m = neighbors[i]
+                if scope[m] and not used[m] and orders[i] & bond and not uniq[groups[m]]:
+                    uniq[groups[m]] = 1
+                    if not atoms[depth, m]:
+                        continue
+                    for j in range(c_offsets[depth], c_offsets[depth + 1]):
+                        closure = path[c_depths[j]]
+                        for k in range(offsets[closure], offsets[closure + 1]):
+                            if neighbors[k] == m:
+                                if not orders[k] & c_bonds[j]:
+                                    closure = -1
+                                break
+                        else:
+                            closure = -1
+                        if closure == -1:
+                            break
+                    else:
+                        stack_atoms[top] = m
+                        stack_depths[top] = depth
+                        top += 1
+            for i in range(offsets[parent], offsets[parent + 1]):
+                uniq[groups[neighbors[i]]] = 0
+else:
+    _get_mapping_numba = None
 
 
 frequency = {1: 10,  # H
@@ -81,15 +162,35 @@ class Isomorphism:
             return False
         return True
 
+    @staticmethod
+    def matcher_backend(name: str):
+        """
+        Switch substructure matching implementation for molecules targets. All implementations give identical
+        mappings. Queries and CGRs are always matched by python implementation.
+
+        :param name: python - default implementation, bitset - target graph converted to adjacency bitsets and
+            atoms equality tables, numba - jit compiled search. numba requires `jit` extra.
+        """
+        global backend
+        if name == 'numba':
+            if _get_mapping_numba is None:
+                raise ImportError('numpy and numba required')
+        elif name not in ('python', 'bitset'):
+            raise ValueError('invalid backend')
+        backend = name
+
     @abstractmethod
-    def get_mapping(self, other, *, automorphism_filter: bool = True,
-                    optimize: bool = True, fallback: bool = False) -> Iterator[Dict[int, int]]:
+    def get_mapping(self, other, *, automorphism_filter: bool = True, optimize: bool = True,
+                    fallback: bool = False, symmetry_breaking: bool = False) -> Iterator[Dict[int, int]]:
         """
         Get self to other substructure mapping generator.
 
         :param automorphism_filter: Skip matches to same atoms.
         :param optimize: Morgan weights based automorphism preventing.
         :param fallback: Try without optimization then nothing matched.
+        :param symmetry_breaking: Prune mappings differing by self automorphism in search without optimization.
+            Used only with automorphism filter. Found atoms sets are same, but other mappings of symmetric atoms
+            can be returned.
         """
         if optimize:
             g = self.__components_mapping(other, other.atoms_order, automorphism_filter)
@@ -100,17 +201,35 @@ class Isomorphism:
                 return
             elif not fallback:
                 return
-        yield from self.__components_mapping(other, {n: i for i, n in enumerate(other)}, automorphism_filter)
+        yield from self.__components_mapping(other, {n: i for i, n in enumerate(other)}, automorphism_filter,
+                                             symmetry_breaking)
 
-    def __components_mapping(self, other, o_order, automorphism_filter):
-        components, closures = self._compiled_query
-        o_atoms = other._atoms
+    def __components_mapping(self, other, o_order, automorphism_filter, symmetry=False):
         o_bonds = other._bonds
+        if isinstance(other, molecule.MoleculeContainer):  # plain values comparison
+            components, closures = self._compiled_predicates
+            o_atoms = other._atoms_features
+        else:
+            components, closures = self._compiled_query
+            o_atoms = other._atoms
+        if symmetry and automorphism_filter:
+            # only one of mappings differing by self automorphism can be yielded.
+            # Morgan pruning of optimized search can choose mapping violating conditions.
+            conditions, cross_conditions = self._automorphism_conditions
+        else:
+            conditions = cross_conditions = None
+        if backend == 'python' or not isinstance(other, molecule.MoleculeContainer):
+            get_mapping = self._get_mapping
+        elif backend == 'bitset':
+            get_mapping = other._bitset_target.get_mapping
+        else:
+            get_mapping = other._numba_target.get_mapping
 
         seen = set()
         if len(components) == 1:
             for candidate in other.connected_components:
-                for mapping in self._get_mapping(components[0], closures, o_atoms, o_bonds, set(candidate), o_order):
+                for mapping in get_mapping(components[0], closures, o_atoms, o_bonds, set(candidate), o_order,
+                                           conditions):
                     if automorphism_filter:
                         atoms = frozenset(mapping.values())
                         if atoms in seen:
@@ -119,12 +238,14 @@ class Isomorphism:
                     yield mapping
         else:
             for candidates in permutations((set(x) for x in other.connected_components), len(components)):
-                mappers = [self._get_mapping(order, closures, o_atoms, o_bonds, component, o_order)
+                mappers = [get_mapping(order, closures, o_atoms, o_bonds, component, o_order, conditions)
                            for order, component in zip(components, candidates)]
                 for match in lazy_product(*mappers):
                     mapping = match[0].copy()
                     for m in match[1:]:
                         mapping.update(m)
+                    if cross_conditions and any(mapping[n] > mapping[m] for n, m in cross_conditions):
+                        continue
                     if automorphism_filter:
                         atoms = frozenset(mapping.values())
                         if atoms in seen:
@@ -133,7 +254,11 @@ class Isomorphism:
                     yield mapping
 
     @staticmethod
-    def _get_mapping(linear_query, query_closures, o_atoms, o_bonds, scope, groups):
+    def _get_mapping(linear_query, query_closures, o_atoms, o_bonds, scope, groups, conditions=None):
+        """
+        :param conditions: query atoms to lists of pairs of mapped before query atom and flag of required
+            greater or lesser target atom number.
+        """
         size = len(linear_query) - 1
         order_depth = {v[0]: k for k, v in enumerate(linear_query)}
         equal_cache = defaultdict(dict)
@@ -174,10 +299,13 @@ class Isomorphism:
                     n = path[order_depth[back]]
 
                 eqs = equal_cache[s_n]
+                cs = conditions and conditions.get(s_n)
                 uniq = set()
                 for o_n, o_bond in o_bonds[n].items():
                     if o_n in scope and o_n not in reversed_mapping and s_bond == o_bond and groups[o_n] not in uniq:
                         uniq.add(groups[o_n])
+                        if cs and not all(o_n > mapping[m] if g else o_n < mapping[m] for m, g in cs):
+                            continue
                         if o_n in eqs:
                             if eqs[o_n]:
                                 if all(bond == o_bonds[mapping[m]].get(o_n) for m, bond in query_closures[s_n]):
@@ -189,6 +317,46 @@ class Isomorphism:
                         else:
                             eqs[o_n] = False
 
+    @cached_property
+    def _bitset_target(self) -> '_BitsetTarget':
+        return _BitsetTarget(self._atoms_features, self._bonds)
+
+    @cached_property
+    def _numba_target(self) -> '_NumbaTarget':
+        return _NumbaTarget(self._atoms_features, self._bonds)
+
+    @cached_property
+    def _atoms_features(self) -> Dict[int, Tuple[int, Optional[int], int, bool, int, int, Tuple[int, ...],
+                                                 Optional[int], int]]:
+        """
+        Atoms features used in atoms equality: atomic number, isotope, charge, radical state, neighbors count,
+        hybridization, rings sizes, implicit hydrogens count and heteroatoms count.
+        """
+        charges = self._charges
+        radicals = self._radicals
+        hybridizations = self._hybridizations
+        hydrogens = self._hydrogens
+        rings_sizes = self.atoms_rings_sizes
+        neighbors = self.neighbors
+        heteroatoms = self.heteroatoms
+        return {n: (a.atomic_number, a.isotope, charges[n], radicals[n], neighbors(n), hybridizations[n],
+                    rings_sizes.get(n, ()), hydrogens[n], heteroatoms(n)) for n, a in self._atoms.items()}
+
+    @cached_property
+    def _compiled_predicates(self):
+        """
+        Compiled query with atoms replaced by predicates of atoms features.
+        """
+        components, closures = self._compiled_query
+        predicates = {}
+        for n, a in self._atoms.items():
+            p = _ElementPredicate(a) if isinstance(a, Element) else _QueryPredicate(a)
+            predicates[n] = predicates.setdefault(p.key, p)  # share equal predicates
+        compiled = []
+        for (n, _), *order in components:
+            compiled.append([(n, predicates[n]), *((m, back, predicates[m], bond) for m, back, _, bond in order)])
+        return compiled, closures
+
     @cached_property
     def _compiled_query(self):
         return self.__compile_query(self._atoms, self._bonds, {n: atom_frequency(a) for n, a in self._atoms.items()})
@@ -223,11 +391,122 @@ class Isomorphism:
         """
         Test for automorphism symmetry of graph.
         """
-        try:
-            next(self.get_automorphism_mapping())
-        except StopIteration:
-            return False
-        return True
+        return bool(self._automorphism_group[0])
+
+    def get_automorphism_generators(self) -> List[Dict[int, int]]:
+        """
+        Generators of automorphism group. Any automorphism mapping is a composition of generators.
+        """
+        return [x.copy() for x in self._automorphism_group[0]]
+
+    @cached_property
+    def automorphism_orbits(self) -> Tuple[Tuple[int, ...], ...]:
+        """
+        Atoms grouped by orbits of automorphism group. Atoms of same orbit are symmetric.
+        """
+        return self._automorphism_group[1]
+
+    @cached_property
+    def _automorphism_group(self) -> Tuple[Tuple[Dict[int, int], ...], Tuple[Tuple[int, ...], ...],
+                                           Tuple[Tuple[int, Tuple[int, ...]], ...]]:
+        """
+        Generators, orbits and stabilizers chain of automorphism group.
+        """
+        return self._get_automorphism_group(self._atoms, self._bonds)
+
+    @cached_property
+    def _automorphism_conditions(self) -> Tuple[Dict[int, Tuple[Tuple[int, bool], ...]], Tuple[Tuple[int, int], ...]]:
+        """
+        Symmetry breaking conditions of substructure search. Only one of mappings differing by automorphism
+        satisfies all conditions.
+
+        :return: query atoms to pairs of mapped before query atom and flag of required greater target atom number,
+            pairs of atoms from different components of which first should be mapped to lesser atom.
+        """
+        components, _ = self._compiled_query
+        depth = {}
+        component = {}
+        for c, order in enumerate(components):
+            for d, (n, *_) in enumerate(order):
+                depth[n] = d
+                component[n] = c
+
+        conditions = defaultdict(list)
+        cross = []
+        for n, orbit in self._automorphism_group[2]:  # mapping[n] < mapping[m] for m in orbit
+            for m in orbit:
+                if m == n:
+                    continue
+                elif component[n] != component[m]:
+                    cross.append((n, m))
+                elif depth[n] < depth[m]:
+                    conditions[m].append((n, True))
+                else:
+                    conditions[n].append((m, False))
+        return {n: tuple(x) for n, x in conditions.items()}, tuple(cross)
+
+    @staticmethod
+    def _get_automorphism_group(atoms, bonds):
+        """
+        Automorphism group by individualization-refinement of atoms partition.
+
+        First leaf of search tree is found by individualization of first atom of smallest cell.
+        For each level of first path atoms of cell not in orbit of individualized atom are individualized and
+        subtree searched for leaf equivalent to first leaf. Found automorphisms fix atoms individualized before
+        and form stabilizers chain.
+        """
+        labels = {n: {m: hash(b) for m, b in ms.items()} for n, ms in bonds.items()}
+        colors = _refine({n: hash(a) for n, a in atoms.items()}, labels)
+
+        path = []
+        levels = [colors]
+        while len(set(colors.values())) < len(colors):
+            cell = _target_cell(colors)
+            path.append((colors, cell))
+            colors = _refine(_individualize(colors, cell[0]), labels)
+            levels.append(colors)
+        first = colors
+        invariants = [sorted(Counter(x.values()).items()) for x in levels]
+
+        def search(colors, level):
+            if sorted(Counter(colors.values()).items()) != invariants[level]:
+                return
+            if level == len(path):
+                inverse = {c: n for n, c in colors.items()}
+                mapping = {n: inverse[c] for n, c in first.items()}
+                for n, m in mapping.items():
+                    if atoms[n] != atoms[m] or atoms[m] != atoms[n]:
+                        return
+                    bs = bonds[m]
+                    for k, b in bonds[n].items():
+                        if b != bs.get(mapping[k]):
+                            return
+                return mapping
+            for n in _target_cell(colors):
+                found = search(_refine(_individualize(colors, n), labels), level + 1)
+                if found is not None:
+                    return found
+
+        orbits = {n: {n} for n in atoms}
+        generators = []
+        chain = []
+        for level in range(len(path) - 1, -1, -1):
+            colors, cell = path[level]
+            v = cell[0]
+            for n in cell:
+                if n in orbits[v]:
+                    continue
+                found = search(_refine(_individualize(colors, n), labels), level + 1)
+                if found is not None:
+                    generators.append(found)
+                    for k, m in found.items():
+                        if orbits[k] is not orbits[m]:
+                            union = orbits[k] | orbits[m]
+                            for x in union:
+                                orbits[x] = union
+            chain.append((v, tuple(sorted(orbits[v]))))
+        chain.reverse()
+        return (tuple(generators), tuple(sorted({tuple(sorted(x)) for x in orbits.values()})), tuple(chain))
 
     def get_automorphism_mapping(self) -> Iterator[Dict[int, int]]:
         """
@@ -258,4 +537,310 @@ class Isomorphism:
                 yield mapping
 
 
+def _refine(colors, labels):
+    """
+    Equitable partition of atoms. Colors are ranks of sorted signatures, thus invariant to atoms numbering.
+    """
+    numb = 0
+    while True:
+        signatures = {n: (c, tuple(sorted((colors[m], b) for m, b in labels[n].items()))) for n, c in colors.items()}
+        ranks = {x: i for i, x in enumerate(sorted(set(signatures.values())))}
+        colors = {n: ranks[x] for n, x in signatures.items()}
+        if len(ranks) == numb:
+            return colors
+        numb = len(ranks)
+
+
+def _individualize(colors, atom):
+    colors = {n: 2 * c + 1 for n, c in colors.items()}
+    colors[atom] -= 1
+    return colors
+
+
+def _target_cell(colors):
+    """
+    Smallest not singleton cell. Ties resolved by colors order.
+    """
+    cells = defaultdict(list)
+    for n, c in colors.items():
+        cells[c].append(n)
+    return min((len(x), c, x) for c, x in cells.items() if len(x) > 1)[2]
+
+
+class _ElementPredicate:
+    """
+    Molecule atom as query. Atomic number, isotope, charge and radical state should be equal.
+    """
+    __slots__ = ('key',)
+
+    def __init__(self, atom):
+        self.key = (atom.atomic_number, atom.isotope, atom.charge, atom.is_radical)
+
+    def __eq__(self, other):
+        """
+        Compare with atom features tuple.
+        """
+        return self.key == other[:4]
+
+
+class _QueryPredicate:
+    """
+    Query atom flattened to plain values.
+    """
+    __slots__ = ('key', 'numbers', 'isotope', 'charge', 'is_radical', 'neighbors', 'hybridization', 'ring_sizes',
+                 'in_ring', 'implicit_hydrogens', 'heteroatoms')
+
+    def __init__(self, atom):
+        if isinstance(atom, ListElement):
+            self.numbers = frozenset(atom._numbers)
+            self.isotope = None
+        elif isinstance(atom, AnyElement):
+            self.numbers = self.isotope = None
+        else:
+            self.numbers = frozenset((atom.atomic_number,))
+            self.isotope = atom.isotope
+        self.charge = atom.charge
+        self.is_radical = atom.is_radical
+        self.neighbors = atom.neighbors
+        self.hybridization = atom.hybridization
+        ring_sizes = atom.ring_sizes
+        if ring_sizes:
+            self.in_ring = bool(ring_sizes[0])  # False - atom not in ring expected
+            self.ring_sizes = frozenset(ring_sizes)
+        else:
+            self.in_ring = self.ring_sizes = None
+        self.implicit_hydrogens = atom.implicit_hydrogens
+        self.heteroatoms = atom.heteroatoms
+        self.key = (self.numbers, self.isotope, self.charge, self.is_radical, self.neighbors, self.hybridization,
+                    self.ring_sizes, self.implicit_hydrogens, self.heteroatoms)
+
+    def __eq__(self, other):
+        """
+        Compare with atom features tuple. Same rules as in query elements.
+        """
+        number, isotope, charge, is_radical, neighbors, hybridization, ring_sizes, hydrogens, heteroatoms = other
+        if charge != self.charge or is_radical != self.is_radical:
+            return False
+        if self.numbers is not None and number not in self.numbers:
+            return False
+        if self.isotope and self.isotope != isotope:
+            return False
+        if self.neighbors and neighbors not in self.neighbors:
+            return False
+        if self.hybridization and hybridization not in self.hybridization:
+            return False
+        if self.ring_sizes is not None:
+            if self.in_ring:
+                if self.ring_sizes.isdisjoint(ring_sizes):
+                    return False
+            elif ring_sizes:
+                return False
+        if self.implicit_hydrogens and hydrogens not in self.implicit_hydrogens:
+            return False
+        if self.heteroatoms and heteroatoms not in self.heteroatoms:
+            return False
+        return True
+
+
+class _Target:
+    """
+    Integer indexed molecule graph with atoms grouped by features used in atoms equality.
+    """
+    __slots__ = ('nodes', 'index', 'features')
+
+    def __init__(self, atoms):
+        self.nodes = list(atoms)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        features = {}
+        for i, f in enumerate(atoms.values()):
+            try:
+                features[f].append(i)
+            except KeyError:
+                features[f] = [i]
+        self.features = list(features.items())  # pairs of atom features and indices of atoms with same features
+
+    def equal_atoms(self, s_atom):
+        """
+        Indices of target atoms equal to query atom. Equality checked once per group of same atoms.
+        """
+        eq = []
+        for features, indices in self.features:
+            if s_atom == features:
+                eq.extend(indices)
+        return eq
+
+
+class _BitsetTarget(_Target):
+    """
+    Molecule graph as adjacency bitsets. Created once per molecule and reused for all queries.
+    """
+    __slots__ = ('neighbors', 'adjacency', 'bonds_masks')
+
+    def __init__(self, atoms, bonds):
+        super().__init__(atoms)
+        index = self.index
+        self.neighbors = [[index[m] for m in bonds[n]] for n in self.nodes]
+        self.adjacency = adjacency = {}  # bond order: list of atoms neighbors bitsets
+        for i, n in enumerate(self.nodes):
+            for m, bond in bonds[n].items():
+                try:
+                    masks = adjacency[bond.order]
+                except KeyError:
+                    masks = adjacency[bond.order] = [0] * len(self.nodes)
+                masks[i] |= 1 << index[m]
+        self.bonds_masks = {}
+
+    def bond_masks(self, bond):
+        """
+        Neighbors bitsets of atoms matched query bond.
+        """
+        orders = bond.order if isinstance(bond.order, tuple) else (bond.order,)
+        try:
+            return self.bonds_masks[orders]
+        except KeyError:
+            adjacency = self.adjacency
+            masks = [0] * len(self.nodes)
+            for o in orders:
+                if o in adjacency:
+                    masks = [x | y for x, y in zip(masks, adjacency[o])]
+            self.bonds_masks[orders] = masks
+            return masks
+
+    def get_mapping(self, linear_query, query_closures, o_atoms, o_bonds, scope, groups, conditions=None):
+        size = len(linear_query) - 1
+        order_depth = {v[0]: k for k, v in enumerate(linear_query)}
+        nodes = self.nodes
+        index = self.index
+        neighbors = self.neighbors
+        o_groups = [groups[n] for n in nodes]
+        scope_mask = 0
+        for n in scope:
+            scope_mask |= 1 << index[n]
+        atoms_masks = [None] * len(linear_query)  # filled on demand
+        plan = [(order_depth[back], s_atom, self.bond_masks(bond),
+                 [(order_depth[m], self.bond_masks(b)) for m, b in query_closures[s_n]],
+                 conditions and [(order_depth[m], g) for m, g in conditions.get(s_n, ())])
+                for s_n, back, s_atom, bond in linear_query[1:]]
+        plan.insert(0, None)
+        query = [x[0] for x in linear_query]
+
+        stack = []
+        path = []
+        used = 0
+
+        mask = 0
+        for i in self.equal_atoms(linear_query[0][1]):
+            mask |= 1 << i
+        mask &= scope_mask
+        for i in range(len(nodes)):
+            if mask >> i & 1:
+                stack.append((i, 0))
+
+        while stack:
+            i, depth = stack.pop()
+            if depth == size:
+                yield {q: nodes[x] for q, x in zip(query, (*path, i))}
+            else:
+                if len(path) != depth:
+                    for x in path[depth:]:
+                        used ^= 1 << x
+                    path = path[:depth]
+                path.append(i)
+                used |= 1 << i
+
+                depth += 1
+                back, s_atom, bond, closures, cs = plan[depth]
+                parent = path[back]
+                bonded = bond[parent] & scope_mask & ~used
+                if not bonded:
+                    continue
+                mask = atoms_masks[depth]
+                if mask is None:
+                    mask = 0
+                    for x in self.equal_atoms(s_atom):
+                        mask |= 1 << x
+                    atoms_masks[depth] = mask
+                matched = bonded & mask
+                for d, closure in closures:
+                    matched &= closure[path[d]]
+                if not matched:
+                    continue
+                uniq = set()
+                for x in neighbors[parent]:
+                    if bonded >> x & 1 and o_groups[x] not in uniq:
+                        uniq.add(o_groups[x])
+                        if cs and not all(nodes[x] > nodes[path[d]] if g else nodes[x] < nodes[path[d]]
+                                          for d, g in cs):
+                            continue
+                        if matched >> x & 1:
+                            stack.append((x, depth))
+
+
+class _NumbaTarget(_Target):
+    """
+    Molecule graph as CSR arrays for jit compiled search. Created once per molecule and reused for all queries.
+    """
+    __slots__ = ('offsets', 'csr', 'orders')
+
+    def __init__(self, atoms, bonds):
+        super().__init__(atoms)
+        index = self.index
+        offsets = [0]
+        csr = []
+        orders = []
+        for n in self.nodes:
+            for m, bond in bonds[n].items():
+                csr.append(index[m])
+                orders.append(1 << bond.order)
+            offsets.append(len(csr))
+        self.offsets = array(offsets, dtype=int64)
+        self.csr = array(csr, dtype=int64)
+        self.orders = array(orders, dtype=int64)
+
+    def get_mapping(self, linear_query, query_closures, o_atoms, o_bonds, scope, groups, conditions=None):
+        order_depth = {v[0]: k for k, v in enumerate(linear_query)}
+        index = self.index
+        nodes = self.nodes
+        query = [x[0] for x in linear_query]
+
+        in_scope = zeros(len(nodes), dtype=uint8)
+        in_scope[[index[n] for n in scope]] = 1
+        atoms = zeros((len(linear_query), len(nodes)), dtype=uint8)
+        for d, x in enumerate(linear_query):
+            atoms[d, self.equal_atoms(x[-2] if d else x[1])] = 1
+        ids = {}
+        o_groups = array([ids.setdefault(groups[n], len(ids)) for n in nodes], dtype=int64)
+
+        back = [0]
+        bonds = [0]
+        c_offsets = [0, 0]
+        c_depths = []
+        c_bonds = []
+        for s_n, b, _, bond in linear_query[1:]:
+            back.append(order_depth[b])
+            bonds.append(self.__bond_bits(bond))
+            for m, cb in query_closures[s_n]:
+                c_depths.append(order_depth[m])
+                c_bonds.append(self.__bond_bits(cb))
+            c_offsets.append(len(c_depths))
+
+        for path in _get_mapping_numba(array(back, dtype=int64), array(bonds, dtype=int64),
+                                       array(c_offsets, dtype=int64), array(c_depths, dtype=int64),
+                                       array(c_bonds, dtype=int64), atoms, self.offsets, self.csr, self.orders,
+                                       o_groups, in_scope):
+            mapping = {q: nodes[x] for q, x in zip(query, path.tolist())}
+            if conditions and not all(mapping[n] > mapping[m] if g else mapping[n] < mapping[m]
+                                      for n, cs in conditions.items() if n in mapping for m, g in cs):
+                continue
+            yield mapping
+
+    @staticmethod
+    def __bond_bits(bond):
+        orders = bond.order if isinstance(bond.order, tuple) else (bond.order,)
+        bits = 0
+        for o in orders:
+            bits |= 1 << o
+        return bits
+
+
 __all__ = ['Isomorphism']
@@ -17,6 +17,7 @@
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
 from CachedMethods import cached_property
+from importlib.util import find_spec
 from itertools import groupby
 from logging import warning
 from operator import itemgetter
@@ -24,6 +25,155 @@ from typing import Dict
 from .._functions import tuple_hash
 
 
+backend = 'python'
+
+if find_spec('numpy'):
+    from numpy import arange, array, empty, full, int64, lexsort, repeat, uint64, unique, where
+
+    # CPython 64 bit int and tuple hashing constants
+    _modulus = uint64((1 << 61) - 1)
+    _prime_1 = uint64(0x9E3779B185EBCA87)
+    _prime_2 = uint64(0xC2B2AE3D27D4EB4F)
+    _prime_5 = uint64(0x27D4EB2F165667C5)
+    _length_mask = uint64(0x27D4EB2F165667C5 ^ 3527539)
+    _minus_one = uint64(0xFFFFFFFFFFFFFFFF)
+    _minus_one_hash = uint64(1546275796)
+    _rotate_left = uint64(31)
+    _rotate_right = uint64(33)
+
+    def _int_hash(x):
+        """
+        CPython hash of int64 numbers as uint64 lanes.
+        """
+        h = where(x < 0, -x, x).view(uint64) % _modulus
+        h = where(x < 0, -h, h)  # uint64 wraps negative values
+        h[h == _minus_one] = _minus_one - uint64(1)  # hash(-1) == -2
+        return h
+
+    def _hash_lane(acc, lane):
+        acc += lane * _prime_2
+        acc = (acc << _rotate_left) | (acc >> _rotate_right)
+        acc *= _prime_1
+        return acc
+
+    def _morgan_step(weights, offsets, degrees, neighbors, orders, max_degree):
+        """
+        One iteration of Morgan algorithm over CSR adjacency. Equal to tuple hashing of atom weight and sorted pairs
+        of neighbors weights and bond orders.
+        """
+        owners = repeat(arange(len(degrees)), degrees)
+        nw = weights[neighbors]
+        sort = lexsort((orders, nw, owners))
+        nw = _int_hash(nw[sort])
+        no = _int_hash(orders[sort])
+
+        acc = _hash_lane(full(len(weights), _prime_5, dtype=uint64), _int_hash(weights))
+        starts = offsets[:-1]
+        for k in range(max_degree):
+            mask = degrees > k
+            e = starts[mask] + k
+            acc[mask] = _hash_lane(_hash_lane(acc[mask], nw[e]), no[e])
+        acc += (2 * degrees + 1).view(uint64) ^ _length_mask
+        acc[acc == _minus_one] = _minus_one_hash
+        return acc.view(int64)
+
+    def _morgan_numpy(weights, offsets, neighbors, orders, tries):
+        degrees = offsets[1:] - offsets[:-1]
+        max_degree = int(degrees.max())
+        atoms = len(weights)
+        numb = len(unique(weights))
+        stab = old_numb = 0
+        for _ in range(tries):
+            weights = _morgan_step(weights, offsets, degrees, neighbors, orders, max_degree)
+            old_numb, numb = numb, len(unique(weights))
+            if numb == atoms:
+                break
+            elif numb == old_numb:
+                if stab == 3:
+                    break
+                stab += 1
+            elif stab:
+                stab = 0
+        else:
+            if numb < old_numb:
+                return weights, True
+        return weights, False
+
+    if find_spec('numba'):
+        from numba import njit
+
+        @njit(cache=True)
+        def _numba_int_hash(x):
+            if x < 0:
+                h = uint64(-x) % uint64((1 << 61) - 1)
+                h = uint64(0) - h
+            else:
+                h = uint64(x) % uint64((1 << 61) - 1)
+            if h == uint64(0xFFFFFFFFFFFFFFFF):
+                h = uint64(0xFFFFFFFFFFFFFFFE)
+            return h
+
+        @njit(cache=True)
+        def _numba_hash_lane(acc, lane):
+            acc += lane * uint64(0xC2B2AE3D27D4EB4F)
+            acc = (acc << uint64(31)) | (acc >> uint64(33))
+            return acc * uint64(0x9E3779B185EBCA87)
+
+        @njit(cache=True)
+        def _numba_unique(weights):
+            return len(unique(weights))
+
+        @njit(cache=True)
+        def _morgan_numba(weights, offsets, neighbors, orders, tries):
+            atoms = len(weights)
+            pairs = empty((neighbors.shape[0], 2), dtype=int64)
+            numb = _numba_unique(weights)
+            stab = old_numb = 0
+            for _ in range(tries):
+                new = empty(atoms, dtype=int64)
+                for n in range(atoms):
+                    start = offsets[n]
+                    stop = offsets[n + 1]
+                    # insertion sort of neighbors weight-order pairs
+                    for i in range(start, stop):
+                        w = weights[neighbors[i]]
+                        o = orders[i]
+                        j = i
+                        while j > start and (pairs[j - 1, 0] > w or pairs[j - 1, 0] == w and pairs[j - 1, 1] > o):
+                            pairs[j] = pairs[j - 1]
+                            j -= 1
+                        pairs[j, 0] = w
+                        pairs[j, 1] = o
+
+                    acc = _numba_hash_lane(uint64(0x27D4EB2F165667C5), _numba_int_hash(weights[n]))
+                    for i in range(start, stop):
+                        acc = _numba_hash_lane(acc, _numba_int_hash(pairs[i, 0]))
+                        acc = _numba_hash_lane(acc, _numba_int_hash(pairs[i, 1]))
+                    acc += uint64(2 * (stop - start) + 1) ^ uint64(0x27D4EB2F165667C5 ^ 3527539)
+                    if acc == uint64(0xFFFFFFFFFFFFFFFF):
+                        acc = uint64(1546275796)
+                    new[n] = int64(acc)
+                weights = new
+
+                old_numb, numb = numb, _numba_unique(weights)
+                if numb == atoms:
+                    break
+                elif numb == old_numb:
+                    if stab == 3:
+                        break
+                    stab += 1
+                elif stab:
+                    stab = 0
+            else:
+                if numb < old_numb:
+                    return weights, True
+            return weights, False
+    else:
+        _morgan_numba = None
+else:
+    _morgan_numpy = _morgan_numba = None
+
+
 class Morgan:
     __slots__ = ()
 
@@ -42,7 +192,28 @@ class Morgan:
         ring = self.ring_atoms
         return self._morgan({n: tuple_hash((hash(a), n in ring)) for n, a in atoms.items()})
 
+    @staticmethod
+    def morgan_backend(name: str):
+        """
+        Switch atoms ordering implementation for all containers. All implementations give identical orderings.
+
+        :param name: python - default implementation, numpy - vectorized implementation,
+            numba - jit compiled implementation. numpy and numba require `jit` extra.
+        """
+        global backend
+        if name == 'numpy':
+            if _morgan_numpy is None:
+                raise ImportError('numpy required')
+        elif name == 'numba':
+            if _morgan_numba is None:
+                raise ImportError('numpy and numba required')
+        elif name != 'python':
+            raise ValueError('invalid backend')
+        backend = name
+
     def _morgan(self, weights: Dict[int, int]) -> Dict[int, int]:
+        if backend != 'python':
+            return self.__morgan_arrays(weights)
         atoms = self._atoms
         bonds = self._bonds
 
@@ -70,5 +241,27 @@ class Morgan:
         return {n: i for i, (_, g) in enumerate(groupby(sorted(weights.items(), key=itemgetter(1)), key=itemgetter(1)),
                                                 start=1) for n, _ in g}
 
+    def __morgan_arrays(self, weights: Dict[int, int]) -> Dict[int, int]:
+        """
+        NumPy or numba implementation of `_morgan` over CSR adjacency.
+        """
+        bonds = self._bonds
+        index = {n: i for i, n in enumerate(bonds)}
+        offsets = [0]
+        neighbors = []
+        orders = []
+        for ms in bonds.values():
+            for m, b in ms.items():
+                neighbors.append(index[m])
+                orders.append(int(b))
+            offsets.append(len(neighbors))
+
+        morgan = _morgan_numba if backend == 'numba' else _morgan_numpy
+        weights, decreased = morgan(array([weights[n] for n in bonds], dtype=int64), array(offsets, dtype=int64),
+                                    array(neighbors, dtype=int64), array(orders, dtype=int64), len(bonds) - 1)
+        if decreased:
+            warning('morgan. number of attempts exceeded. uniqueness has decreased.')
+        return dict(zip(bonds, (unique(weights, return_inverse=True)[1] + 1).tolist()))
+
 
 __all__ = ['Morgan']
@@ -330,6 +330,7 @@ class Standardize:
 
     def __standardize(self: Union['MoleculeContainer', 'Standardize']):
         atom_map = {'charge': self._charges, 'is_radical': self._radicals, 'hybridization': self._hybridizations}
+        self._thaw()  # bonds changed inplace
         bonds = self._bonds
         hs = set()
         log = []
@@ -367,6 +368,7 @@ class Standardize:
         return hs, log
 
     def __patch_path(self: 'MoleculeContainer', path):
+        self._thaw()  # bonds changed inplace
         bonds = self._bonds
         for n, m, b in path:
             bonds[n][m]._Bond__order = b
@@ -140,59 +140,82 @@ class Stereo:
         self._cis_trans_stereo.clear()
         self.flush_cache()
 
-    def get_mapping(self: 'Container', other: 'Container', **kwargs):
-        atoms_stereo = self._atoms_stereo
-        allenes_stereo = self._allenes_stereo
-        cis_trans_stereo = self._cis_trans_stereo
-        if atoms_stereo or allenes_stereo or cis_trans_stereo:
-            other_atoms_stereo = other._atoms_stereo
-            other_allenes_stereo = other._allenes_stereo
-            other_cis_trans_stereo = other._cis_trans_stereo
-            other_translate_tetrahedron_sign = other._translate_tetrahedron_sign
-            other_translate_allene_sign = other._translate_allene_sign
-            other_translate_cis_trans_sign = other._translate_cis_trans_sign
-
-            tetrahedrons = self._stereo_tetrahedrons
-            cis_trans = self._stereo_cis_trans
-            allenes = self._stereo_allenes
+    @cached_property
+    def _automorphism_conditions(self: 'Container'):
+        if self._atoms_stereo or self._allenes_stereo or self._cis_trans_stereo:
+            return {}, ()  # stereo marks can break graph symmetry
+        return super()._automorphism_conditions
 
+    def get_mapping(self: 'Container', other: 'Container', **kwargs):
+        if self._atoms_stereo or self._allenes_stereo or self._cis_trans_stereo:
             for mapping in super().get_mapping(other, **kwargs):
-                for n, s in atoms_stereo.items():
-                    m = mapping[n]
-                    if m not in other_atoms_stereo:  # self stereo atom not stereo in other
-                        break
-                    # translate stereo mark in other in order of self tetrahedron
-                    if other_translate_tetrahedron_sign(m, [mapping[x] for x in tetrahedrons[n]]) != s:
-                        break
-                else:
-                    for n, s in allenes_stereo.items():
-                        m = mapping[n]
-                        if m not in other_allenes_stereo:  # self stereo allene not stereo in other
-                            break
-                        # translate stereo mark in other in order of self allene
-                        nn, nm, *_ = allenes[n]
-                        if other_translate_allene_sign(m, mapping[nn], mapping[nm]) != s:
-                            break
-                    else:
-                        for nm, s in cis_trans_stereo.items():
-                            n, m = nm
-                            on, om = mapping[n], mapping[m]
-                            if (on, om) not in other_cis_trans_stereo:
-                                if (om, on) not in other_cis_trans_stereo:
-                                    break  # self stereo cis_trans not stereo in other
-                                else:
-                                    nn, nm, *_ = cis_trans[nm]
-                                    if other_translate_cis_trans_sign(om, on, mapping[nm], mapping[nn]) != s:
-                                        break
-                            else:
-                                nn, nm, *_ = cis_trans[nm]
-                                if other_translate_cis_trans_sign(on, om, mapping[nn], mapping[nm]) != s:
-                                    break
-                        else:
-                            yield mapping
+                if self._is_stereo_mapping(other, mapping):
+                    yield mapping
         else:
             yield from super().get_mapping(other, **kwargs)
 
+    def _is_stereo_mapping(self: 'Container', other: 'Container', mapping: Dict[int, int]) -> bool:
+        """
+        Test stereo marks of self are equal to stereo marks of other in given mapping.
+        """
+        other_atoms_stereo = other._atoms_stereo
+        other_allenes_stereo = other._allenes_stereo
+        other_cis_trans_stereo = other._cis_trans_stereo
+        other_translate_tetrahedron_sign = other._translate_tetrahedron_sign
+        other_translate_allene_sign = other._translate_allene_sign
+        other_translate_cis_trans_sign = other._translate_cis_trans_sign
+
+        tetrahedrons = self._stereo_tetrahedrons
+        cis_trans = self._stereo_cis_trans
+        allenes = self._stereo_allenes
+
+        for n, s in self._atoms_stereo.items():
+            m = mapping[n]
+            if m not in other_atoms_stereo:  # self stereo atom not stereo in other
+                return False
+            # translate stereo mark in other in order of self tetrahedron
+            if other_translate_tetrahedron_sign(m, [mapping[x] for x in tetrahedrons[n]]) != s:
+                return False
+        for n, s in self._allenes_stereo.items():
+            m = mapping[n]
+            if m not in other_allenes_stereo:  # self stereo allene not stereo in other
+                return False
+            # translate stereo mark in other in order of self allene
+            nn, nm, *_ = allenes[n]
+            if other_translate_allene_sign(m, mapping[nn], mapping[nm]) != s:
+                return False
+        for nm, s in self._cis_trans_stereo.items():
+            n, m = nm
+            on, om = mapping[n], mapping[m]
+            if (on, om) not in other_cis_trans_stereo:
+                if (om, on) not in other_cis_trans_stereo:
+                    return False  # self stereo cis_trans not stereo in other
+                nn, nm, *_ = cis_trans[nm]
+                if other_translate_cis_trans_sign(om, on, mapping[nm], mapping[nn]) != s:
+                    return False
+            else:
+                nn, nm, *_ = cis_trans[nm]
+                if other_translate_cis_trans_sign(on, om, mapping[nn], mapping[nm]) != s:
+                    return False
+        return True
+
+    @cached_property
+    def _stereo_mapping_atoms(self: 'Container') -> Tuple[int, ...]:
+        """
+        Atoms which mapping affects stereo marks comparison.
+        """
+        atoms = set()
+        for n in self._atoms_stereo:
+            atoms.add(n)
+            atoms.update(self._stereo_tetrahedrons[n])
+        for n in self._allenes_stereo:
+            atoms.add(n)
+            atoms.update(self._stereo_allenes[n][:2])
+        for nm in self._cis_trans_stereo:
+            atoms.update(nm)
+            atoms.update(self._stereo_cis_trans[nm][:2])
+        return tuple(sorted(atoms))
+
     def _translate_tetrahedron_sign(self: 'Container', n, env):
         """
         Get sign of chiral tetrahedron atom for specified neighbors order
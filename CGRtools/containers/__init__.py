@@ -21,6 +21,8 @@ from .cgr import *
 from .query import *
 from .cgr_query import *
 from .reaction import *
+from .batch import *
 
 
 __all__ = [x for x in locals() if x.endswith('Container')]
+__all__.append('MoleculeBatch')
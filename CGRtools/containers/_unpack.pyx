@@ -17,10 +17,11 @@
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
 from libc.math cimport ldexp
-from CGRtools.containers.bonds import Bond
+from libc.stdlib cimport malloc, free
+from CGRtools.containers.bonds import Bond, DynamicBond
 
 
-def unpack(bytes data):
+def unpack(bytes data, bint frozen=False):
     cdef short isotope_shift
     cdef unsigned char a, b, c, d
     cdef unsigned short na, nct, i, j, n, m, bo, shift = 3, order_shift = 0
@@ -152,8 +153,11 @@ def unpack(bytes data):
                 tmp[m] = py_bonds[m][n]
             else:
                 bo = orders[order_shift]
-                bond = object.__new__(Bond)
-                bond._Bond__order = bo
+                if frozen:
+                    bond = Bond.shared(bo)
+                else:
+                    bond = object.__new__(Bond)
+                    bond._Bond__order = bo
                 tmp[m] = bond
                 order_shift += 1
 
@@ -195,6 +199,283 @@ def unpack(bytes data):
             py_atoms_stereo, py_allenes_stereo, py_cis_trans_stereo)
 
 
+
+def unpack_v2(bytes data, bint frozen=False):
+    cdef const unsigned char *buf = data
+    cdef unsigned long size = len(data)
+    cdef short isotope_shift
+    cdef unsigned char a, b, bo, h
+    cdef unsigned long shift = 2, na, nct, nb = 0, i, j, k, n, m, order_shift
+
+    cdef unsigned long *mapping
+    cdef unsigned long *neighbors
+    cdef unsigned long *connections
+
+    cdef object bond
+    cdef dict py_charges, py_radicals, py_hydrogens, py_plane, py_hybridization, py_bonds, tmp
+    cdef dict py_atoms_stereo, py_allenes_stereo, py_cis_trans_stereo
+    cdef list py_mapping, py_atoms, py_isotopes
+
+    na = read_varint(buf, size, &shift)
+    nct = read_varint(buf, size, &shift)
+    if na > (size - shift) // 9:  # atom takes at least 9 bytes
+        raise ValueError('truncated data')
+
+    py_mapping = []
+    py_atoms = []
+    py_isotopes = []
+    py_bonds = {}
+    py_charges = {}
+    py_radicals = {}
+    py_hydrogens = {}
+    py_plane = {}
+    py_atoms_stereo = {}
+    py_allenes_stereo = {}
+    py_cis_trans_stereo = {}
+    py_hybridization = {}
+
+    mapping = <unsigned long *> malloc(na * sizeof(unsigned long))
+    neighbors = <unsigned long *> malloc(na * sizeof(unsigned long))
+    if not mapping or not neighbors:
+        free(mapping)
+        free(neighbors)
+        raise MemoryError()
+
+    try:
+        for i in range(na):
+            n = read_varint(buf, size, &shift)
+            mapping[i] = n
+            neighbors[i] = read_varint(buf, size, &shift)
+            nb += neighbors[i]
+
+            if shift + 7 > size:
+                raise ValueError('truncated data')
+            a = buf[shift]
+            b = buf[shift + 1]
+            if a & 0x80:
+                py_atoms_stereo[n] = a & 0x40 != 0
+            if a & 0x20:
+                py_allenes_stereo[n] = a & 0x10 != 0
+
+            if b & 0x7f > 118:
+                raise ValueError('invalid atomic number')
+            py_mapping.append(n)
+            py_atoms.append(b & 0x7f)
+            isotope_shift = (a & 0x0f) << 1 | b >> 7
+            if isotope_shift:
+                py_isotopes.append(common_isotopes[b & 0x7f] + isotope_shift)
+            else:
+                py_isotopes.append(None)
+
+            py_plane[n] = (double_from2bytes(buf[shift + 2], buf[shift + 3]),
+                           double_from2bytes(buf[shift + 4], buf[shift + 5]))
+
+            h = buf[shift + 6]
+            py_hydrogens[n] = None if h >> 5 == 7 else h >> 5
+            py_charges[n] = ((h >> 1) & 0x0f) - 4
+            py_radicals[n] = h & 0x01 != 0
+            py_hybridization[n] = 1
+            shift += 7
+
+        if nb > size - shift:  # connection takes at least 1 byte
+            raise ValueError('truncated data')
+        connections = <unsigned long *> malloc((nb + 1) * sizeof(unsigned long))
+        if not connections:
+            raise MemoryError()
+        try:
+            for j in range(nb):
+                connections[j] = read_varint(buf, size, &shift)
+
+            order_shift = shift
+            j = 0
+            for i in range(na):
+                n = mapping[i]
+                tmp = {}
+                py_bonds[n] = tmp
+                for k in range(neighbors[i]):
+                    m = connections[j]
+                    j += 1
+                    if m in py_bonds:  # bond partially exists. need back-connection.
+                        tmp[m] = py_bonds[m][n]
+                    else:
+                        if order_shift >= size:
+                            raise ValueError('truncated data')
+                        bo = buf[order_shift]
+                        order_shift += 1
+                        if frozen:
+                            bond = Bond.shared(bo)
+                        else:
+                            bond = object.__new__(Bond)
+                            bond._Bond__order = bo
+                        tmp[m] = bond
+                        if bo != 1 and bo != 8:
+                            update_hybridization(py_hybridization, n, bo)
+                            update_hybridization(py_hybridization, m, bo)
+        finally:
+            free(connections)
+    finally:
+        free(mapping)
+        free(neighbors)
+
+    shift = order_shift
+    for i in range(nct):
+        n = read_varint(buf, size, &shift)
+        m = read_varint(buf, size, &shift)
+        if shift >= size:
+            raise ValueError('truncated data')
+        py_cis_trans_stereo[(n, m)] = buf[shift] != 0
+        shift += 1
+
+    return (py_mapping, py_atoms, py_isotopes,
+            py_charges, py_radicals, py_hydrogens, py_plane, py_hybridization, py_bonds,
+            py_atoms_stereo, py_allenes_stereo, py_cis_trans_stereo)
+
+
+cdef unsigned long read_varint(const unsigned char *buf, unsigned long size, unsigned long *shift) except? 0:
+    cdef unsigned long value = 0
+    cdef unsigned char b, o = 0
+
+    while True:
+        if shift[0] >= size or o > 56:
+            raise ValueError('truncated data')
+        b = buf[shift[0]]
+        shift[0] += 1
+        value |= <unsigned long> (b & 0x7f) << o
+        if b < 0x80:
+            return value
+        o += 7
+
+
+cdef update_hybridization(dict hybridization, unsigned long n, unsigned char bo):
+    cdef unsigned char h = hybridization[n]
+
+    if h != 4:
+        if bo == 4:
+            hybridization[n] = 4
+        elif bo == 2:
+            if h == 1:
+                hybridization[n] = 2
+            else:
+                hybridization[n] = 3
+        elif bo == 3:
+            hybridization[n] = 3
+
+
+def unpack_cgr(bytes data):
+    cdef short isotope_shift
+    cdef unsigned char a, b, c
+    cdef unsigned short na, i, j, n, m, order_shift = 0
+    cdef unsigned long nb = 0, shift = 2
+
+    cdef unsigned short[4095] mapping, atom, isotopes, neighbors
+    cdef unsigned short *connections
+    cdef unsigned char *orders
+    cdef short[4095] charges, p_charges
+    cdef bint[4095] radicals, p_radicals
+    cdef double[4095] x, y
+    cdef bint[4096] seen
+
+    cdef object bond
+    cdef dict py_charges, py_p_charges, py_radicals, py_p_radicals, py_plane, py_bonds, tmp
+    cdef list py_mapping, py_atoms, py_isotopes
+
+    a, b = data[:2]
+    na = a << 8 | b
+
+    for i in range(na):
+        a, b = data[shift: shift + 2]
+        mapping[i] = a << 4 | (b & 0xf0) >> 4
+        neighbors[i] = b & 0x0f
+        nb += b & 0x0f
+
+        a, b = data[shift + 2: shift + 4]
+        radicals[i] = a & 0x80
+        p_radicals[i] = a & 0x40
+        atom[i] = b & 0x7f
+        isotope_shift = (a & 0x0f) << 1 | b >> 7
+        if isotope_shift:
+            isotopes[i] = common_isotopes[b & 0x7f] + isotope_shift
+        else:
+            isotopes[i] = 0
+
+        a, b = data[shift + 4: shift + 6]
+        x[i] = double_from2bytes(a, b)
+        a, b = data[shift + 6: shift + 8]
+        y[i] = double_from2bytes(a, b)
+
+        a = data[shift + 8]
+        charges[i] = (a >> 4) - 4
+        p_charges[i] = (a & 0x0f) - 4
+
+        shift += 9
+
+    nb //= 2
+    connections = <unsigned short *> malloc((2 * nb + 1) * sizeof(unsigned short))
+    orders = <unsigned char *> malloc(nb + 1)
+    if not connections or not orders:
+        free(connections)
+        free(orders)
+        raise MemoryError()
+
+    try:
+        for i in range(nb):
+            a, b, c = data[shift: shift + 3]
+            connections[i * 2] = a << 4| (b & 0xf0) >> 4
+            connections[i * 2 + 1] = (b & 0x0f) << 8 | c
+            shift += 3
+
+        for i in range(nb):
+            orders[i] = data[shift + i]
+
+        for i in range(na):
+            seen[mapping[i]] = False
+
+        py_mapping = []
+        py_atoms = []
+        py_isotopes = []
+        py_bonds = {}
+        py_charges = {}
+        py_p_charges = {}
+        py_radicals = {}
+        py_p_radicals = {}
+        py_plane = {}
+
+        shift = 0
+        for i in range(na):
+            n = mapping[i]
+
+            py_mapping.append(n)
+            py_atoms.append(atom[i])
+            py_isotopes.append(isotopes[i] or None)
+
+            py_charges[n] = charges[i]
+            py_p_charges[n] = p_charges[i]
+            py_radicals[n] = radicals[i]
+            py_p_radicals[n] = p_radicals[i]
+            py_plane[n] = (x[i], y[i])
+
+            tmp = {}
+            py_bonds[n] = tmp
+            seen[n] = True
+            for j in range(shift, shift + neighbors[i]):
+                m = connections[j]
+                if seen[m]:  # bond partially exists. need back-connection.
+                    tmp[m] = py_bonds[m][n]
+                else:
+                    a = orders[order_shift]
+                    bond = object.__new__(DynamicBond)
+                    bond._DynamicBond__order = a >> 4 or None
+                    bond._DynamicBond__p_order = a & 0x0f or None
+                    tmp[m] = bond
+                    order_shift += 1
+            shift += neighbors[i]
+    finally:
+        free(connections)
+        free(orders)
+
+    return py_mapping, py_atoms, py_isotopes, py_charges, py_p_charges, py_radicals, py_p_radicals, py_plane, py_bonds
+
+
 cdef short[119] common_isotopes
 common_isotopes[:] = [0, -15, -12, -9, -7, -5, -4, -2, 0, 3, 4, 7, 8, 11, 12, 15, 16, 19, 24, 23, 24, 29,
                       32, 35, 36, 39, 40, 43, 43, 48, 49, 54, 57, 59, 63, 64, 68, 69, 72, 73, 75, 77,
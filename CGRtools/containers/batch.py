@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from array import array
+from importlib.util import find_spec
+from operator import index
+from typing import Dict, Iterable, Iterator, List, Union
+from weakref import ref
+from .bonds import Bond
+from .molecule import MoleculeContainer
+from ..periodictable import Element
+
+
+if find_spec('numpy'):
+    from numpy import concatenate, cumsum, frombuffer, int8, int16, int64, float32, uint8, uint32, zeros
+else:
+    frombuffer = None
+
+
+class MoleculeBatch:
+    """
+    Columnar storage of molecules collection.
+
+    Atoms and bonds of all molecules are kept in shared flat NumPy arrays (atoms numbers, atomic numbers, isotopes,
+    charges, radicals, implicit hydrogens, 2d coordinates and CSR-like adjacency with bond orders).
+    MoleculeContainer objects are materialized on indexing.
+
+    Note: conformers are not stored. 2d coordinates are stored as float32.
+    """
+    __slots__ = ('_atoms_offsets', '_bonds_offsets', '_mapping', '_atomic_numbers', '_isotopes', '_charges',
+                 '_radicals', '_hydrogens', '_plane', '_degrees', '_neighbors', '_orders', '_atoms_stereo',
+                 '_allenes_stereo', '_cis_trans_stereo', '_names', '_meta')
+
+    def __init__(self, molecules: Iterable[MoleculeContainer], *, meta: bool = False):
+        """
+        :param molecules: molecules collection
+        :param meta: store names and metadata of molecules
+        """
+        if frombuffer is None:
+            raise ImportError('numpy required')
+
+        atoms_offsets = array('q', [0])
+        bonds_offsets = array('q', [0])
+        mapping = array('I')
+        atomic_numbers = array('B')
+        isotopes = array('h')
+        charges = array('b')
+        radicals = array('b')
+        hydrogens = array('b')
+        plane = array('f')
+        degrees = array('B')
+        neighbors = array('I')
+        orders = array('B')
+        atoms_stereo = (array('q'), array('b'))
+        allenes_stereo = (array('q'), array('b'))
+        cis_trans_stereo = (array('q'), array('q'), array('b'))
+        names = [] if meta else None
+        metas = [] if meta else None
+
+        for mol in molecules:
+            if not isinstance(mol, MoleculeContainer):
+                raise TypeError('MoleculeContainer expected')
+            shift = atoms_offsets[-1]
+            local = {n: i for i, n in enumerate(mol._atoms)}
+            mc = mol._charges
+            mr = mol._radicals
+            mh = mol._hydrogens
+            mp = mol._plane
+            for n, a in mol._atoms.items():
+                ms = mol._bonds[n]
+                mapping.append(n)
+                atomic_numbers.append(a.atomic_number)
+                isotopes.append(a.isotope or 0)
+                charges.append(mc[n])
+                radicals.append(mr[n])
+                h = mh[n]
+                hydrogens.append(-1 if h is None else h)
+                plane.extend(mp[n])
+                degrees.append(len(ms))
+                for m, b in ms.items():
+                    neighbors.append(local[m])
+                    orders.append(b.order)
+            for n, s in mol._atoms_stereo.items():
+                atoms_stereo[0].append(shift + local[n])
+                atoms_stereo[1].append(s)
+            for n, s in mol._allenes_stereo.items():
+                allenes_stereo[0].append(shift + local[n])
+                allenes_stereo[1].append(s)
+            for (n, m), s in mol._cis_trans_stereo.items():
+                cis_trans_stereo[0].append(shift + local[n])
+                cis_trans_stereo[1].append(shift + local[m])
+                cis_trans_stereo[2].append(s)
+            atoms_offsets.append(shift + len(local))
+            bonds_offsets.append(len(neighbors))
+            if meta:
+                names.append(mol.name)
+                metas.append(mol.meta.copy())
+
+        self._atoms_offsets = frombuffer(atoms_offsets, dtype=int64)
+        self._bonds_offsets = frombuffer(bonds_offsets, dtype=int64)
+        self._mapping = frombuffer(mapping, dtype=uint32)
+        self._atomic_numbers = frombuffer(atomic_numbers, dtype=uint8)
+        self._isotopes = frombuffer(isotopes, dtype=int16)
+        self._charges = frombuffer(charges, dtype=int8)
+        self._radicals = frombuffer(radicals, dtype=int8).astype(bool)
+        self._hydrogens = frombuffer(hydrogens, dtype=int8)
+        self._plane = frombuffer(plane, dtype=float32).reshape(-1, 2)
+        self._degrees = frombuffer(degrees, dtype=uint8)
+        self._neighbors = frombuffer(neighbors, dtype=uint32)
+        self._orders = frombuffer(orders, dtype=uint8)
+        self._atoms_stereo = (frombuffer(atoms_stereo[0], dtype=int64),
+                              frombuffer(atoms_stereo[1], dtype=int8).astype(bool))
+        self._allenes_stereo = (frombuffer(allenes_stereo[0], dtype=int64),
+                                frombuffer(allenes_stereo[1], dtype=int8).astype(bool))
+        self._cis_trans_stereo = (frombuffer(cis_trans_stereo[0], dtype=int64),
+                                  frombuffer(cis_trans_stereo[1], dtype=int64),
+                                  frombuffer(cis_trans_stereo[2], dtype=int8).astype(bool))
+        self._names = names
+        self._meta = metas
+
+    def __len__(self):
+        return len(self._atoms_offsets) - 1
+
+    def __iter__(self) -> Iterator[MoleculeContainer]:
+        return (self._molecule(i) for i in range(len(self)))
+
+    def __getitem__(self, item) -> Union[MoleculeContainer, List[MoleculeContainer]]:
+        """
+        Materialize molecule by index or list of molecules by slice.
+        """
+        if isinstance(item, slice):
+            return [self._molecule(i) for i in range(*item.indices(len(self)))]
+        item = index(item)
+        _len = len(self)
+        if item >= _len or item < -_len:
+            raise IndexError('List index out of range')
+        if item < 0:
+            item += _len
+        return self._molecule(item)
+
+    @property
+    def atoms_counts(self):
+        """
+        Array of atoms count per molecule.
+        """
+        return self._atoms_offsets[1:] - self._atoms_offsets[:-1]
+
+    @property
+    def bonds_counts(self):
+        """
+        Array of bonds count per molecule.
+        """
+        return (self._bonds_offsets[1:] - self._bonds_offsets[:-1]) // 2
+
+    @property
+    def molecular_charges(self):
+        """
+        Array of total charges of molecules.
+        """
+        return self._reduce(self._charges)
+
+    def elements_counts(self, atomic_number: int):
+        """
+        Array of given element atoms count per molecule.
+        """
+        return self._reduce(self._atomic_numbers == atomic_number)
+
+    def _reduce(self, values):
+        """
+        Per molecule sums of atoms values.
+        """
+        acc = concatenate((zeros(1, dtype=int64), cumsum(values, dtype=int64)))
+        return acc[self._atoms_offsets[1:]] - acc[self._atoms_offsets[:-1]]
+
+    def _molecule(self, i: int) -> MoleculeContainer:
+        a0, a1 = self._atoms_offsets[i: i + 2].tolist()
+        b0, b1 = self._bonds_offsets[i: i + 2].tolist()
+
+        mapping = self._mapping[a0:a1].tolist()
+        mol = object.__new__(MoleculeContainer)
+        mol._charges = dict(zip(mapping, self._charges[a0:a1].tolist()))
+        mol._radicals = dict(zip(mapping, self._radicals[a0:a1].tolist()))
+        mol._hydrogens = {n: None if h == -1 else h for n, h in zip(mapping, self._hydrogens[a0:a1].tolist())}
+        mol._plane = dict(zip(mapping, map(tuple, self._plane[a0:a1].tolist())))
+        mol._atoms_stereo = self._stereo(self._atoms_stereo, a0, a1, mapping)
+        mol._allenes_stereo = self._stereo(self._allenes_stereo, a0, a1, mapping)
+        ctn, ctm, cts = self._cis_trans_stereo
+        start, stop = ctn.searchsorted((a0, a1)).tolist()
+        mol._cis_trans_stereo = {(mapping[n - a0], mapping[m - a0]): s for n, m, s in
+                                 zip(ctn[start:stop].tolist(), ctm[start:stop].tolist(), cts[start:stop].tolist())}
+        mol._conformers = []
+        mol._parsed_mapping = {}
+        mol._frozen = False
+        if self._meta is None:
+            mol._Graph__meta = {}
+            mol._Graph__name = ''
+        else:
+            mol._Graph__meta = self._meta[i].copy()
+            mol._Graph__name = self._names[i]
+
+        mol._atoms = atoms = {}
+        for n, a, iso in zip(mapping, self._atomic_numbers[a0:a1].tolist(), self._isotopes[a0:a1].tolist()):
+            atoms[n] = a = object.__new__(Element.from_atomic_number(a))
+            a._Core__isotope = iso or None
+            a._graph = ref(mol)
+            a._map = n
+
+        mol._bonds = bonds = {}
+        neighbors = iter(zip(self._neighbors[b0:b1].tolist(), self._orders[b0:b1].tolist()))
+        for n, d in zip(mapping, self._degrees[a0:a1].tolist()):
+            bonds[n] = bn = {}
+            for _ in range(d):
+                m, o = next(neighbors)
+                m = mapping[m]
+                if m in bonds:  # bond partially exists. need back-connection.
+                    bn[m] = bonds[m][n]
+                else:
+                    bond = object.__new__(Bond)
+                    bond._Bond__order = o
+                    bn[m] = bond
+
+        mol._hybridizations = {}
+        for n in mapping:
+            mol._calc_hybridization(n)
+        return mol
+
+    @staticmethod
+    def _stereo(stereo, a0: int, a1: int, mapping: List[int]) -> Dict[int, bool]:
+        atoms, signs = stereo
+        start, stop = atoms.searchsorted((a0, a1)).tolist()
+        return {mapping[n - a0]: s for n, s in zip(atoms[start:stop].tolist(), signs[start:stop].tolist())}
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+
+__all__ = ['MoleculeBatch']
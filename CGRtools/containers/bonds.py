@@ -63,6 +63,17 @@ class Bond:
             return copy
         raise TypeError('Bond expected')
 
+    @staticmethod
+    def shared(order: int) -> 'Bond':
+        """
+        Interned bond object of given order. Used in frozen molecules.
+        Shared bonds shouldn't be changed inplace.
+        """
+        return _shared_bonds[order]
+
+
+_shared_bonds = {x: Bond(x) for x in (1, 2, 3, 4, 8)}
+
 
 class DynamicBond:
     __slots__ = ('__order', '__p_order')
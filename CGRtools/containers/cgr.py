@@ -18,7 +18,10 @@
 #
 from CachedMethods import cached_args_method
 from collections import defaultdict
+from struct import pack_into, unpack_from
 from typing import List, Union, Tuple, Dict, Optional
+from weakref import ref
+from zlib import compress, decompress
 from . import cgr_query as query, molecule  # cyclic imports resolve
 from .bonds import Bond, DynamicBond
 from .common import Graph
@@ -434,6 +437,200 @@ class CGRContainer(Graph, CGRSmiles, CGRComponents, DepictCGR, Calculate2DCGR, X
         self._hybridizations[n] = hybridization
         self._p_hybridizations[n] = p_hybridization
 
+    def pack(self) -> bytes:
+        """
+        Pack into compressed bytes.
+        Note:
+            * Less than 4096 atoms supported. Atoms mapping should be in range 1-4095.
+            * Isotope shift should be in range -15 - 15 relatively mdl.common_isotopes
+            * Atoms neighbors should be in range 0-15
+
+        Format specification:
+        Big endian bytes order
+        16 bit - number of atoms
+        Atom block 9 bytes (repeated):
+        12 bit - atom number
+        4 bit - number of neighbors
+        1 bit - radical state
+        1 bit - product radical state
+        2 bit - zero padding
+        5 bit - isotope (00000 - not specified, over = isotope - common_isotope + 16)
+        7 bit - atomic number (<=118)
+        32 bit - XY float16 coordinates
+        4 bit - charge (charge + 4. possible range -4 - 4)
+        4 bit - product charge
+        Connection table: flatten list of neighbors. neighbors count stored in atom block.
+        Repeated block (equal to bonds count).
+        24 bit - paired 12 bit numbers.
+        Bonds block (repeated):
+        4 bit - order (0 - None)
+        4 bit - product order
+        """
+        return compress(self._pack(), 9)
+
+    def _pack(self) -> bytes:
+        """
+        Pack into uncompressed bytes. See `pack` for format specification.
+        """
+        bonds = self._bonds
+        if max(bonds) > 4095:
+            raise ValueError('Big CGRs not supported')
+        if any(len(x) > 15 for x in bonds.values()):
+            raise ValueError('To many neighbors not supported')
+        from ..files._mdl.mol import common_isotopes
+
+        plane = self._plane
+        charges = self._charges
+        p_charges = self._p_charges
+        radicals = self._radicals
+        p_radicals = self._p_radicals
+        bonds_count = self.bonds_count
+
+        data = bytearray(2 + 9 * self.atoms_count + 4 * bonds_count)
+        pack_into('>H', data, 0, self.atoms_count)
+        shift = 2
+        seen = set()
+        neighbors = []
+        orders = []
+        for n, a in self._atoms.items():
+            bs = bonds[n]
+            neighbors.extend(bs)
+            seen.add(n)
+            for m, b in bs.items():
+                if m not in seen:
+                    orders.append(((b.order or 0) << 4) | (b.p_order or 0))
+
+            # 1 bit - radical | 1 bit - product radical | 2 bit - padding | 5 bit - isotope | 7 bit - atomic number
+            ria = a.atomic_number
+            if a.isotope:
+                ria |= (a.isotope - common_isotopes[a.atomic_symbol] + 16) << 7
+            if radicals[n]:
+                ria |= 0x8000
+            if p_radicals[n]:
+                ria |= 0x4000
+            pack_into('>2H2eB', data, shift, (n << 4) | len(bs), ria, *plane[n],
+                      ((charges[n] + 4) << 4) | (p_charges[n] + 4))
+            shift += 9
+
+        ngb = iter(neighbors)
+        for n, m in zip(ngb, ngb):
+            data[shift: shift + 3] = ((n << 12) | m).to_bytes(3, 'big')
+            shift += 3
+        data[shift:] = orders
+        return bytes(data)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'CGRContainer':
+        """
+        Unpack from compressed bytes.
+        """
+        return cls._unpack(decompress(data))
+
+    @classmethod
+    def _unpack(cls, data: bytes) -> 'CGRContainer':
+        """
+        Unpack from uncompressed bytes.
+        """
+        try:
+            from ._unpack import unpack_cgr
+        except ImportError:
+            return cls._pure_unpack(data)
+        (mapping, atom_numbers, isotopes, charges, p_charges, radicals, p_radicals, plane,
+         bonds) = unpack_cgr(data)
+
+        cgr = object.__new__(cls)
+        cgr._bonds = bonds
+        cgr._plane = plane
+        cgr._charges = charges
+        cgr._p_charges = p_charges
+        cgr._radicals = radicals
+        cgr._p_radicals = p_radicals
+        cgr._conformers = []
+        cgr._parsed_mapping = {}
+        cgr._Graph__meta = {}
+        cgr._Graph__name = ''
+        cgr._atoms = atoms = {}
+
+        for n, a, i in zip(mapping, atom_numbers, isotopes):
+            atoms[n] = a = object.__new__(DynamicElement.from_atomic_number(a))
+            a._Core__isotope = i
+            a._graph = ref(cgr)
+            a._map = n
+
+        cgr._hybridizations = {}
+        cgr._p_hybridizations = {}
+        for n in mapping:
+            cgr._calc_hybridization(n)
+        return cgr
+
+    @classmethod
+    def pure_unpack(cls, data: bytes) -> 'CGRContainer':
+        """
+        Unpack from compressed bytes. Python implementation.
+        """
+        return cls._pure_unpack(decompress(data))
+
+    @classmethod
+    def _pure_unpack(cls, data: bytes) -> 'CGRContainer':
+        from ..files._mdl.mol import common_isotopes
+
+        data = memoryview(data)
+        cgr = cls()
+        atoms = cgr._atoms
+        bonds = cgr._bonds
+        plane = cgr._plane
+        charges = cgr._charges
+        p_charges = cgr._p_charges
+        radicals = cgr._radicals
+        p_radicals = cgr._p_radicals
+
+        neighbors = {}
+        shift = 2
+        for _ in range(unpack_from('>H', data)[0]):
+            nn, ria, x, y, cc = unpack_from('>2H2eB', data, shift)
+            n = nn >> 4
+            neighbors[n] = nn & 0x0f
+
+            a = DynamicElement.from_atomic_number(ria & 0x7f)
+            ai = (ria >> 7) & 0x1f
+            if ai:
+                ai += common_isotopes[a.__name__[7:]] - 16
+            else:
+                ai = None
+            atoms[n] = a = a(ai)
+            a._attach_to_graph(cgr, n)
+
+            charges[n] = (cc >> 4) - 4
+            p_charges[n] = (cc & 0x0f) - 4
+            radicals[n] = bool(ria & 0x8000)
+            p_radicals[n] = bool(ria & 0x4000)
+            plane[n] = (x, y)
+            shift += 9
+
+        bc = sum(neighbors.values()) // 2
+        connections = []
+        for o in range(bc):
+            nm = int.from_bytes(data[shift: shift + 3], 'big')
+            connections.append(nm >> 12)
+            connections.append(nm & 0x0fff)
+            shift += 3
+
+        con = iter(connections)
+        orders = iter(data[shift: shift + bc])
+        for n, ms in neighbors.items():
+            bonds[n] = cbn = {}
+            for _ in range(ms):
+                m = next(con)
+                if m in bonds:  # bond partially exists. need back-connection.
+                    cbn[m] = bonds[m][n]
+                else:
+                    o = next(orders)
+                    cbn[m] = DynamicBond(o >> 4 or None, o & 0x0f or None)
+
+        for n in neighbors:
+            cgr._calc_hybridization(n)
+        return cgr
+
     def __getstate__(self):
         return {'conformers': self._conformers, 'p_charges': self._p_charges, 'p_radicals': self._p_radicals,
                 **super().__getstate__()}
@@ -20,17 +20,19 @@ from CachedMethods import cached_args_method, cached_property
 from collections import defaultdict, Counter
 from itertools import zip_longest
 from math import ceil
-from struct import pack_into, unpack_from
+from struct import pack, pack_into, unpack_from
 from typing import List, Union, Tuple, Optional, Dict
 from weakref import ref
 from zlib import compress, decompress
 from . import cgr, query  # cyclic imports resolve
 from .bonds import Bond, DynamicBond, QueryBond
 from .common import Graph
+from .._functions import pack_varint, unpack_varint
 from ..algorithms.aromatics import Aromatize
 from ..algorithms.calculate2d import Calculate2DMolecule
 from ..algorithms.components import StructureComponents
 from ..algorithms.depict import DepictMolecule
+from ..algorithms.fingerprints import Fingerprints
 from ..algorithms.huckel import Huckel
 from ..algorithms.smiles import MoleculeSmiles
 from ..algorithms.standardize import Standardize
@@ -42,9 +44,9 @@ from ..periodictable import Element, QueryElement
 
 
 class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeSmiles, StructureComponents,
-                        DepictMolecule, Calculate2DMolecule, Tautomers, Huckel, X3domMolecule):
+                        DepictMolecule, Calculate2DMolecule, Tautomers, Huckel, X3domMolecule, Fingerprints):
     __slots__ = ('_conformers', '_hybridizations', '_atoms_stereo', '_hydrogens', '_cis_trans_stereo',
-                 '_allenes_stereo')
+                 '_allenes_stereo', '_frozen')
 
     def __init__(self):
         self._conformers: List[Dict[int, Tuple[float, float, float]]] = []
@@ -53,6 +55,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         self._atoms_stereo: Dict[int, bool] = {}
         self._allenes_stereo: Dict[int, bool] = {}
         self._cis_trans_stereo: Dict[Tuple[int, int], bool] = {}
+        self._frozen = False
 
         super().__init__()
 
@@ -93,7 +96,10 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         """
         if not isinstance(bond, Bond):
             bond = Bond(bond)
+        elif bond is Bond.shared(bond.order):
+            bond = bond.copy()
 
+        self._thaw()
         super().add_bond(n, m, bond)
         self._conformers.clear()  # clean conformers. need full recalculation for new system
 
@@ -116,6 +122,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         Implicit hydrogens marks will not be set if atoms in aromatic rings.
         Call `kekule()` and `thiele()` in sequence to fix marks.
         """
+        self._thaw()
         old_bonds = self._bonds[n]  # save bonds
         isnt_hydrogen = self._atoms[n].atomic_number != 1
         super().delete_atom(n)
@@ -140,6 +147,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         Implicit hydrogens marks will not be set if atoms in aromatic rings.
         Call `kekule()` and `thiele()` in sequence to fix marks.
         """
+        self._thaw()
         super().delete_bond(n, m)
         self._conformers.clear()  # clean conformers. need full recalculation for new system
 
@@ -151,6 +159,41 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         if self._atoms[n].atomic_number != 1 and self._atoms[m].atomic_number != 1:
             self._fix_stereo()
 
+    @property
+    def is_frozen(self) -> bool:
+        """
+        Molecule bonds are shared interned objects.
+        """
+        return self._frozen
+
+    def freeze(self):
+        """
+        Replace bonds with shared interned objects. Reduces memory usage of read-only molecules.
+
+        Molecule stays editable: bonds will be copied on first modification of molecule (copy-on-write).
+        """
+        if self._frozen:
+            return
+        shared = Bond.shared
+        for m_bond in self._bonds.values():
+            for m, bond in m_bond.items():
+                m_bond[m] = shared(bond.order)
+        self._frozen = True
+
+    def _thaw(self):
+        """
+        Replace shared bonds with own copies. Should be called before inplace bonds modification.
+        """
+        if self._frozen:
+            bonds = self._bonds
+            seen = set()
+            for n, m_bond in bonds.items():
+                seen.add(n)
+                for m, bond in m_bond.items():
+                    if m not in seen:
+                        m_bond[m] = bonds[m][n] = bond.copy()
+            self._frozen = False
+
     @cached_args_method
     def neighbors(self, n: int) -> int:
         """number of neighbors atoms excluding any-bonded"""
@@ -217,6 +260,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         copy._atoms_stereo = self._atoms_stereo.copy()
         copy._allenes_stereo = self._allenes_stereo.copy()
         copy._cis_trans_stereo = self._cis_trans_stereo.copy()
+        copy._frozen = False
         return copy
 
     def substructure(self, atoms, *, as_query: bool = False, recalculate_hydrogens=True,
@@ -260,6 +304,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
             sub._heteroatoms = {n: () for n in atoms}
         else:
             sub._conformers = [{n: c[n] for n in atoms} for c in self._conformers]
+            sub._frozen = False
 
             if recalculate_hydrogens:
                 sub._hydrogens = {}
@@ -545,16 +590,20 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
                     hybridization = 2
         self._hybridizations[n] = hybridization
 
-    def pack(self) -> bytes:
+    def pack(self, *, version: Optional[int] = None) -> bytes:
         """
         Pack into compressed bytes.
+
+        :param version: format version. By default version 1 used if molecule fits its limitations, otherwise 2.
+
         Note:
-            * Less than 4096 atoms supported. Atoms mapping should be in range 1-4095.
-            * Implicit hydrogens count should be in range 0-7
+            * Version 1: Less than 4096 atoms supported. Atoms mapping should be in range 1-4095.
+            * Version 1: Implicit hydrogens count should be in range 0-7
+            * Version 2: Implicit hydrogens count should be in range 0-6 or not calculated
             * Isotope shift should be in range -15 - 15 relatively mdl.common_isotopes
-            * Atoms neighbors should be in range 0-15
+            * Version 1: Atoms neighbors should be in range 0-15
 
-        Format specification:
+        Version 1 format specification:
         Big endian bytes order
         12 bit - number of atoms
         12 bit - cis/trans stereo block size
@@ -579,10 +628,115 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         24 bit - atoms pair
         7 bit - zero padding
         1 bit - sign
+
+        Version 2 format specification:
+        Big endian bytes order. varint - unsigned LEB128 encoded integer.
+        12 bit - zero. Distinguishes versioned formats from version 1 (which can't contain zero atoms).
+        4 bit - format version (2)
+        varint - number of atoms
+        varint - cis/trans stereo block size
+        Atom block (repeated):
+        varint - atom number
+        varint - number of neighbors
+        16 bit - stereo signs, isotope and atomic number. Same as in version 1
+        32 bit - XY float16 coordinates
+        3 bit - hydrogens (0-6, 7 - not calculated)
+        4 bit - charge (charge + 4. possible range -4 - 4)
+        1 bit - radical state
+        Connection table: flatten list of varint neighbors.
+        Bonds order block: 8 bit bond order (repeated, equal to bonds count).
+        Cis/trans data block (repeated):
+        varint - first atom
+        varint - second atom
+        8 bit - sign
+        """
+        return compress(self._pack(version), 9)
+
+    def _pack(self, version: Optional[int] = None) -> bytes:
         """
+        Pack into uncompressed bytes. See `pack` for format specification.
+        """
+        if version is None:
+            if max(self._bonds) > 4095 or self.bonds_count > 4095 or \
+                    any(len(x) > 15 for x in self._bonds.values()) or None in self._hydrogens.values():
+                return self._pack_v2()
+            return self._pack_v1()
+        elif version == 1:
+            return self._pack_v1()
+        elif version == 2:
+            return self._pack_v2()
+        raise ValueError('unsupported pack format version')
+
+    def _pack_v2(self) -> bytes:
+        from ..files._mdl.mol import common_isotopes
+
+        bonds = self._bonds
+        plane = self._plane
+        charges = self._charges
+        radicals = self._radicals
+        hydrogens = self._hydrogens
+        atoms_stereo = self._atoms_stereo
+        allenes_stereo = self._allenes_stereo
+        cis_trans_stereo = self._cis_trans_stereo
+
+        data = bytearray(b'\x00\x02')
+        pack_varint(self.atoms_count, data)
+        pack_varint(len(cis_trans_stereo), data)
+
+        neighbors = bytearray()
+        orders = bytearray()
+        seen = set()
+        for n, a in self._atoms.items():
+            bs = bonds[n]
+            seen.add(n)
+            for m, b in bs.items():
+                pack_varint(m, neighbors)
+                if m not in seen:
+                    orders.append(b.order)
+
+            hcr = (charges[n] + 4) << 1
+            if radicals[n]:
+                hcr |= 1
+            h = hydrogens[n]
+            if h is None:
+                hcr |= 0xe0
+            elif h > 6:
+                raise ValueError('Implicit hydrogens count should be in range 0-6')
+            else:
+                hcr |= h << 5
+
+            sia = a.atomic_number
+            if a.isotope:
+                sia |= (a.isotope - common_isotopes[a.atomic_symbol] + 16) << 7
+            if n in atoms_stereo:
+                if atoms_stereo[n]:
+                    sia |= 0xc000
+                else:
+                    sia |= 0x8000
+            if n in allenes_stereo:
+                if allenes_stereo[n]:
+                    sia |= 0x3000
+                else:
+                    sia |= 0x2000
+
+            pack_varint(n, data)
+            pack_varint(len(bs), data)
+            data.extend(pack('>H2eB', sia, *plane[n], hcr))
+
+        data.extend(neighbors)
+        data.extend(orders)
+        for (n, m), s in cis_trans_stereo.items():
+            pack_varint(n, data)
+            pack_varint(m, data)
+            data.append(s)
+        return bytes(data)
+
+    def _pack_v1(self) -> bytes:
         bonds = self._bonds
         if max(bonds) > 4095:
             raise ValueError('Big molecules not supported')
+        if self.bonds_count > 4095:
+            raise ValueError('Too many bonds not supported')
         if any(len(x) > 15 for x in bonds.values()):
             raise ValueError('To many neighbors not supported')
         from ..files._mdl.mol import common_isotopes
@@ -659,19 +813,34 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         for o, ((n, m), s) in enumerate(cis_trans_stereo.items()):
             pack_into('>I', data, shift + 4 * o, (n << 20) | (m << 8) | s)
 
-        return compress(bytes(data), 9)
+        return bytes(data)
 
     @classmethod
-    def unpack(cls, data: bytes) -> 'MoleculeContainer':
+    def unpack(cls, data: bytes, *, frozen: bool = False) -> 'MoleculeContainer':
         """
         Unpack from compressed bytes.
+
+        :param frozen: use shared bonds objects. See `freeze` method.
+        """
+        return cls._unpack(decompress(data), frozen)
+
+    @classmethod
+    def _unpack(cls, data: bytes, frozen: bool = False) -> 'MoleculeContainer':
+        """
+        Unpack from uncompressed bytes.
         """
         try:  # windows? ;)
-            from ._unpack import unpack
+            from ._unpack import unpack, unpack_v2
         except ImportError:
-            return cls.pure_unpack(data)
+            return cls._pure_unpack(data, frozen)
+        if data[0] or data[1] >> 4:  # version 1 contains at least one atom
+            unpacked = unpack(data, frozen)
+        elif data[1] == 2:
+            unpacked = unpack_v2(data, frozen)
+        else:
+            raise ValueError('unsupported pack format version')
         (mapping, atom_numbers, isotopes, charges, radicals, hydrogens, plane, hybridization, bonds,
-         atoms_stereo, allenes_stereo, cis_trans_stereo) = unpack(decompress(data))
+         atoms_stereo, allenes_stereo, cis_trans_stereo) = unpacked
 
         mol = object.__new__(cls)
         mol._bonds = bonds
@@ -683,6 +852,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         mol._allenes_stereo = allenes_stereo
         mol._cis_trans_stereo = cis_trans_stereo
         mol._hybridizations = hybridization
+        mol._frozen = frozen
 
         mol._conformers = []
         mol._parsed_mapping = {}
@@ -698,13 +868,23 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
         return mol
 
     @classmethod
-    def pure_unpack(cls, data: bytes) -> 'MoleculeContainer':
+    def pure_unpack(cls, data: bytes, *, frozen: bool = False) -> 'MoleculeContainer':
         """
         Unpack from compressed bytes. Python implementation.
+
+        :param frozen: use shared bonds objects. See `freeze` method.
         """
+        return cls._pure_unpack(decompress(data), frozen)
+
+    @classmethod
+    def _pure_unpack(cls, data: bytes, frozen: bool = False) -> 'MoleculeContainer':
+        if not data[0] and not data[1] >> 4:  # versioned format
+            if data[1] == 2:
+                return cls._pure_unpack_v2(data, frozen)
+            raise ValueError('unsupported pack format version')
         from ..files._mdl.mol import common_isotopes
 
-        data = memoryview(decompress(data))
+        data = memoryview(data)
         mol = cls()
         atoms = mol._atoms
         bonds = mol._bonds
@@ -767,6 +947,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
 
         con = iter(connections)
         ords = iter(orders)
+        bond = Bond.shared if frozen else Bond
         for n, ms in neighbors.items():
             bonds[n] = cbn = {}
             for _ in range(ms):
@@ -774,7 +955,8 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
                 if m in bonds:  # bond partially exists. need back-connection.
                     cbn[m] = bonds[m][n]
                 else:
-                    cbn[m] = Bond(next(ords))
+                    cbn[m] = bond(next(ords))
+        mol._frozen = frozen
 
         shift += 2 * ceil(bc / 5)
         for o in range(acs & 0x0fff):  # cis/trans
@@ -785,10 +967,90 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
             mol._calc_hybridization(n)
         return mol
 
+    @classmethod
+    def _pure_unpack_v2(cls, data: bytes, frozen: bool = False) -> 'MoleculeContainer':
+        from ..files._mdl.mol import common_isotopes
+
+        data = memoryview(data)
+        mol = cls()
+        atoms = mol._atoms
+        bonds = mol._bonds
+        plane = mol._plane
+        charges = mol._charges
+        radicals = mol._radicals
+        hydrogens = mol._hydrogens
+        atoms_stereo = mol._atoms_stereo
+        allenes_stereo = mol._allenes_stereo
+        cis_trans_stereo = mol._cis_trans_stereo
+
+        neighbors = {}
+        na, shift = unpack_varint(data, 2)
+        nct, shift = unpack_varint(data, shift)
+        for _ in range(na):
+            n, shift = unpack_varint(data, shift)
+            neighbors[n], shift = unpack_varint(data, shift)
+            if shift + 7 > len(data):
+                raise ValueError('truncated data')
+            sia, x, y, hcr = unpack_from('>H2eB', data, shift)
+            shift += 7
+
+            s = sia >> 14
+            if s:
+                atoms_stereo[n] = s == 3
+            s = (sia >> 12) & 3
+            if s:
+                allenes_stereo[n] = s == 3
+
+            a = Element.from_atomic_number(sia & 0x7f)
+            ai = (sia >> 7) & 0x1f
+            if ai:
+                ai += common_isotopes[a.__name__] - 16
+            else:
+                ai = None
+            atoms[n] = a = a(ai)
+            a._attach_to_graph(mol, n)
+
+            charges[n] = ((hcr >> 1) & 0x0f) - 4
+            radicals[n] = bool(hcr & 0x01)
+            hydrogens[n] = None if hcr >> 5 == 7 else hcr >> 5
+            plane[n] = (x, y)
+
+        connections = []
+        for _ in range(sum(neighbors.values())):
+            m, shift = unpack_varint(data, shift)
+            connections.append(m)
+
+        con = iter(connections)
+        bond = Bond.shared if frozen else Bond
+        for n, ms in neighbors.items():
+            bonds[n] = cbn = {}
+            for _ in range(ms):
+                m = next(con)
+                if m in bonds:  # bond partially exists. need back-connection.
+                    cbn[m] = bonds[m][n]
+                else:
+                    if shift >= len(data):
+                        raise ValueError('truncated data')
+                    cbn[m] = bond(data[shift])
+                    shift += 1
+        mol._frozen = frozen
+
+        for _ in range(nct):
+            n, shift = unpack_varint(data, shift)
+            m, shift = unpack_varint(data, shift)
+            if shift >= len(data):
+                raise ValueError('truncated data')
+            cis_trans_stereo[(n, m)] = bool(data[shift])
+            shift += 1
+
+        for n in neighbors:
+            mol._calc_hybridization(n)
+        return mol
+
     def __getstate__(self):
         return {'conformers': self._conformers, 'hydrogens': self._hydrogens, 'atoms_stereo': self._atoms_stereo,
                 'allenes_stereo': self._allenes_stereo, 'cis_trans_stereo': self._cis_trans_stereo,
-                **super().__getstate__()}
+                'frozen': self._frozen, **super().__getstate__()}
 
     def __setstate__(self, state):
         if '_BaseContainer__meta' in state:  # 2.8 reverse compatibility
@@ -838,6 +1100,7 @@ class MoleculeContainer(MoleculeStereo, Graph, Aromatize, Standardize, MoleculeS
             state['cis_trans_stereo'] = {}
 
         super().__setstate__(state)
+        self._frozen = state.get('frozen', False)  # restored bonds are still shared in frozen molecule
         self._conformers = state['conformers']
         self._atoms_stereo = state['atoms_stereo']
         self._allenes_stereo = state['allenes_stereo']
@@ -16,19 +16,25 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
-from typing import List, Tuple, Union, Dict
+from CachedMethods import cached_property
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+from os import cpu_count
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from . import molecule  # cyclic imports resolve
 from .bonds import Bond, QueryBond
 from .common import Graph
 from ..algorithms.calculate2d import Calculate2DQuery
 from ..algorithms.components import StructureComponents
 from ..algorithms.depict import DepictQuery
+from ..algorithms.fingerprints import Fingerprints
 from ..algorithms.smiles import QuerySmiles
 from ..algorithms.stereo import Stereo
 from ..periodictable import Element, QueryElement, AnyElement
 
 
-class QueryContainer(Stereo, Graph, QuerySmiles, StructureComponents, DepictQuery, Calculate2DQuery):
+class QueryContainer(Stereo, Graph, QuerySmiles, StructureComponents, DepictQuery, Calculate2DQuery, Fingerprints):
     __slots__ = ('_neighbors', '_hybridizations', '_atoms_stereo', '_cis_trans_stereo', '_allenes_stereo',
                  '_hydrogens', '_rings_sizes', '_heteroatoms')
 
@@ -267,11 +273,63 @@ class QueryContainer(Stereo, Graph, QuerySmiles, StructureComponents, DepictQuer
             return super().get_mapping(other, **kwargs)
         raise TypeError('MoleculeContainer or QueryContainer expected')
 
+    def search(self, molecules: Union['MoleculeBatch', Iterable['molecule.MoleculeContainer']], *,
+               processes: Optional[int] = 1, first_only: bool = True, mappings: bool = False,
+               chunksize: int = 1000) -> Iterator[Union[int, Tuple[int, List[Dict[int, int]]]]]:
+        """
+        Indices of molecules containing query substructure. Indices are yielded in order of molecules.
+
+        MoleculeBatch is screened by atoms, bonds and elements counts before mapping search and sent to worker
+        processes once. Other molecules are sent to workers in packed form. See `MoleculeContainer.pack`.
+        Molecules are read and packed only as results are consumed, twice processes count chunks are in flight.
+        Stop iteration to terminate search.
+
+        :param processes: number of worker processes. 1 - search in current process. None - CPU count.
+        :param first_only: search only first mapping of each molecule.
+        :param mappings: yield pairs of index and list of mappings instead of indices.
+        :param chunksize: number of molecules sent to worker at once.
+        """
+        from .batch import MoleculeBatch
+        from ..utils.parallel import _ordered_map
+
+        if chunksize < 1:
+            raise ValueError('chunksize should be positive')
+        if isinstance(molecules, MoleculeBatch):
+            batch = molecules
+            candidates = (batch.atoms_counts >= len(self)) & (batch.bonds_counts >= self.bonds_count)
+            for n, c in Counter(a.atomic_number for a in self._atoms.values() if isinstance(a, QueryElement)).items():
+                candidates &= batch.elements_counts(n) >= c
+            candidates = iter(candidates.nonzero()[0].tolist())
+            chunks = iter(lambda: list(islice(candidates, chunksize)), [])
+        else:
+            batch = None
+            pack = processes != 1
+            targets = ((n, m.pack() if pack else m) for n, m in enumerate(molecules))
+            chunks = iter(lambda: list(islice(targets, chunksize)), [])
+
+        if processes == 1:
+            for chunk in chunks:
+                yield from _search_chunk(chunk, self, batch, first_only, mappings)
+        else:
+            with Pool(processes, _init_search, (self, batch, first_only, mappings)) as pool:
+                for hits in _ordered_map(pool, _search_worker, chunks, 2 * (processes or cpu_count())):
+                    yield from hits
+
     def get_mcs_mapping(self, other: Union['QueryContainer', 'molecule.MoleculeContainer'], **kwargs):
         if isinstance(other, (QueryContainer, molecule.MoleculeContainer)):
             return super().get_mcs_mapping(other, **kwargs)
         raise TypeError('MoleculeContainer or QueryContainer expected')
 
+    @cached_property
+    def screening_fingerprint(self) -> int:
+        """
+        Bits required in molecule screening fingerprint for possible substructure matching.
+        Any and list atoms and bonds with multiple orders are ignored.
+        """
+        return self._screening_fingerprint({n: a.atomic_number or None for n, a in self._atoms.items()},
+                                           {n: {m: b.order[0] if len(b.order) == 1 else None for m, b in ms.items()}
+                                            for n, ms in self._bonds.items()})
+
     @staticmethod
     def _validate_neighbors(neighbors):
         if neighbors is None:
@@ -389,4 +447,38 @@ class QueryContainer(Stereo, Graph, QuerySmiles, StructureComponents, DepictQuer
         self._heteroatoms = state['heteroatoms']
 
 
+_search = None  # query, batch and options of worker process
+
+
+def _init_search(*args):
+    global _search
+    _search = args
+
+
+def _search_worker(chunk):
+    return _search_chunk(chunk, *_search)
+
+
+def _search_chunk(chunk, query, batch, first_only, mappings):
+    hits = []
+    for target in chunk:
+        if batch is None:
+            n, m = target
+            if isinstance(m, bytes):
+                m = molecule.MoleculeContainer.unpack(m)
+        else:
+            n = target
+            m = batch._molecule(n)
+        if first_only:
+            mapping = next(query.get_mapping(m), None)
+            if mapping is None:
+                continue
+            hits.append((n, [mapping]) if mappings else n)
+        else:
+            found = list(query.get_mapping(m))
+            if found:
+                hits.append((n, found) if mappings else n)
+    return hits
+
+
 __all__ = ['QueryContainer']
@@ -21,8 +21,11 @@ from collections.abc import Iterable
 from functools import reduce
 from hashlib import sha512
 from itertools import chain
+from json import dumps, loads
 from operator import or_
+from struct import pack, unpack_from
 from typing import Dict, Iterable as TIterable, Iterator, Optional, Tuple, Union
+from zlib import compress, decompress
 from .cgr import CGRContainer
 from .cgr_query import QueryCGRContainer
 from .molecule import MoleculeContainer
@@ -199,6 +202,82 @@ class ReactionContainer(StandardizeReaction, ReactionComponents, DepictReaction)
         copy._signs = self._signs
         return copy
 
+    def pack(self) -> bytes:
+        """
+        Pack into compressed bytes. Molecules and CGRs reactions supported.
+        Limitations of `MoleculeContainer.pack` and `CGRContainer.pack` are applicable.
+
+        Format specification:
+        Big endian bytes order
+        8 bit - graphs type (0 - molecules, 1 - CGRs)
+        16 bit - reactants count
+        16 bit - reagents count
+        16 bit - products count
+        Graphs blocks (repeated in reactants, reagents, products order):
+        32 bit - block size
+        Uncompressed packed graph
+        Rest - UTF-8 JSON of name and metadata. Empty if name and metadata not set.
+        """
+        graphs = tuple(self.molecules())
+        if all(isinstance(x, MoleculeContainer) for x in graphs):
+            data = [pack('>B3H', 0, len(self.__reactants), len(self.__reagents), len(self.__products))]
+        elif all(isinstance(x, CGRContainer) for x in graphs):
+            data = [pack('>B3H', 1, len(self.__reactants), len(self.__reagents), len(self.__products))]
+        else:
+            raise TypeError('Queries packing not supported')
+        for x in graphs:
+            x = x._pack()
+            data.append(pack('>I', len(x)))
+            data.append(x)
+        if self.__meta or self.__name:
+            data.append(dumps({'name': self.__name, 'meta': self.__meta}).encode())
+        return compress(b''.join(data), 9)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'ReactionContainer':
+        """
+        Unpack from compressed bytes.
+        """
+        return cls.__unpack(data, False)
+
+    @classmethod
+    def pure_unpack(cls, data: bytes) -> 'ReactionContainer':
+        """
+        Unpack from compressed bytes. Python implementation.
+        """
+        return cls.__unpack(data, True)
+
+    @classmethod
+    def __unpack(cls, data: bytes, pure: bool) -> 'ReactionContainer':
+        data = decompress(data)
+        graph_type, *counts = unpack_from('>B3H', data)
+        graph_type = CGRContainer if graph_type else MoleculeContainer
+        graph_unpack = graph_type._pure_unpack if pure else graph_type._unpack
+        shift = 7
+        graphs = []
+        for c in counts:
+            tmp = []
+            for _ in range(c):
+                size = unpack_from('>I', data, shift)[0]
+                shift += 4
+                tmp.append(graph_unpack(data[shift: shift + size]))
+                shift += size
+            graphs.append(tuple(tmp))
+
+        reaction = object.__new__(cls)
+        reaction._ReactionContainer__reactants, reaction._ReactionContainer__reagents, \
+            reaction._ReactionContainer__products = graphs
+        if shift < len(data):
+            meta = loads(data[shift:])
+            reaction._ReactionContainer__meta = meta['meta']
+            reaction._ReactionContainer__name = meta['name']
+        else:
+            reaction._ReactionContainer__meta = {}
+            reaction._ReactionContainer__name = ''
+        reaction._arrow = None
+        reaction._signs = None
+        return reaction
+
     @cached_method
     def compose(self) -> CGRContainer:
         """
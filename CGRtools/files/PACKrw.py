@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from array import array
+from io import SEEK_END
+from json import dumps, loads
+from mmap import mmap, ACCESS_READ
+from operator import index
+from pathlib import Path
+from struct import Struct
+from sys import byteorder
+from typing import Iterator, List, Union
+from zlib import compress, decompress
+from ..containers import MoleculeContainer
+
+
+signature = b'CGRPDB\x00\x01'
+header = Struct('<8sQ')  # signature, footer position. zero position means not finalized file.
+footer = Struct('<QQ')  # records count, columns count
+record = Struct('<2Q')  # molecule boundaries
+record_meta = Struct('<3Q')  # molecule and metadata boundaries
+
+
+class PackedMoleculeDB:
+    """
+    Append-only database of packed molecules. Supports `with` context manager.
+
+    File layout: header, data segment of `MoleculeContainer.pack` records, footer with offsets table.
+    Appended records are stored after previous offsets table, which is replaced in header on close only.
+    Unclosed database keeps previous records readable.
+    If metadata stored, each record followed by compressed JSON with molecule name and meta.
+    Opened for reading database is memory-mapped and provides O(1) random access to molecules.
+    """
+    def __init__(self, path: Union[str, Path], mode: str = 'r', *, meta: bool = False, frozen: bool = False):
+        """
+        :param path: database file path
+        :param mode: r - read, w - create new database, a - append to existing database.
+        :param meta: store names and metadata of molecules. Used only for new databases.
+        :param frozen: unpack molecules with shared bonds. See `MoleculeContainer.freeze`.
+        """
+        if mode not in ('r', 'w', 'a'):
+            raise ValueError('invalid mode')
+        self._frozen = frozen
+        self._mode = mode
+        if mode == 'w':
+            self._file = file = open(path, 'wb')
+            file.write(header.pack(signature, 0))
+            self._columns = 2 if meta else 1
+            self._offsets = array('Q')
+            return
+
+        self._file = file = open(path, 'rb' if mode == 'r' else 'r+b')
+        sig, position = header.unpack(file.read(header.size))
+        if sig != signature:
+            raise ValueError('invalid database file')
+        if not position:
+            raise ValueError('database not finalized')
+        file.seek(position)
+        count, self._columns = footer.unpack(file.read(footer.size))
+
+        if mode == 'r':
+            self._mmap = mmap(file.fileno(), 0, access=ACCESS_READ)
+            self._data = memoryview(self._mmap)
+            self._table = position + footer.size
+            self._count = count
+        else:
+            self._offsets = offsets = array('Q')
+            offsets.frombytes(file.read(8 * (count * self._columns + 1)))
+            if byteorder == 'big':
+                offsets.byteswap()
+            # end of last record replaced by start of next record.
+            # unused bytes between them are trailing data of zlib stream and ignored on decompression.
+            offsets.pop()
+            self._written = len(offsets)
+            # new records written after offsets table. existing database stays valid until close
+            file.seek(0, SEEK_END)
+
+    def __len__(self):
+        if self._mode == 'r':
+            return self._count
+        return len(self._offsets) // self._columns
+
+    def __iter__(self) -> Iterator[MoleculeContainer]:
+        if self._mode != 'r':
+            raise ValueError('database opened for writing')
+        return (self._molecule(i) for i in range(self._count))
+
+    def __getitem__(self, item) -> Union[MoleculeContainer, List[MoleculeContainer]]:
+        """
+        Unpack molecule by index or list of molecules by slice.
+        """
+        if self._mode != 'r':
+            raise ValueError('database opened for writing')
+        if isinstance(item, slice):
+            return [self._molecule(i) for i in range(*item.indices(self._count))]
+        item = index(item)
+        if item >= self._count or item < -self._count:
+            raise IndexError('List index out of range')
+        if item < 0:
+            item += self._count
+        return self._molecule(item)
+
+    def write(self, molecule: MoleculeContainer):
+        """
+        Append molecule to database.
+        """
+        if self._mode == 'r':
+            raise ValueError('database opened for reading')
+        if not isinstance(molecule, MoleculeContainer):
+            raise TypeError('MoleculeContainer expected')
+        file = self._file
+        self._offsets.append(file.tell())
+        file.write(molecule.pack())
+        if self._columns == 2:
+            self._offsets.append(file.tell())
+            file.write(compress(dumps({'name': molecule.name, 'meta': molecule.meta}).encode(), 9))
+
+    def close(self):
+        """
+        Close database. For writing mode offsets table is stored.
+        """
+        file = self._file
+        if file.closed:
+            return
+        if self._mode == 'r':
+            self._data.release()
+            self._mmap.close()
+        elif self._mode == 'w' or len(self._offsets) != self._written:
+            offsets = self._offsets
+            count = len(offsets) // self._columns
+            position = file.tell()
+            offsets.append(position)
+            position += -position % 8  # align table
+            file.seek(position)
+            file.write(footer.pack(count, self._columns))
+            if byteorder == 'big':
+                offsets = offsets[:]
+                offsets.byteswap()
+            file.write(offsets.tobytes())
+            file.flush()  # table should be stored before header update
+            file.seek(0)
+            file.write(header.pack(signature, position))
+        file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        self.close()
+
+    def _molecule(self, i: int) -> MoleculeContainer:
+        data = self._data
+        if self._columns == 1:
+            start, stop = record.unpack_from(data, self._table + 8 * i)
+            with data[start:stop] as packed:  # release mmap buffer even on errors
+                return MoleculeContainer.unpack(packed, frozen=self._frozen)
+
+        start, stop, end = record_meta.unpack_from(data, self._table + 16 * i)
+        with data[start:stop] as packed, data[stop:end] as meta:
+            mol = MoleculeContainer.unpack(packed, frozen=self._frozen)
+            meta = loads(decompress(meta))
+        mol.name = meta['name']
+        mol.meta.update(meta['meta'])
+        return mol
+
+
+__all__ = ['PackedMoleculeDB']
@@ -21,12 +21,10 @@ from bisect import bisect_left
 from collections import defaultdict
 from itertools import chain
 from logging import warning
-from os.path import getsize
-from subprocess import check_output
 from time import strftime
 from traceback import format_exc
 from warnings import warn
-from ._mdl import parse_error
+from ._mdl import find_lines, parse_error, stream_size
 from ._mdl import MDLRead, MDLWrite, MOLRead, EMOLRead, RXNRead, ERXNRead, EMDLWrite
 from ..containers import ReactionContainer, MoleculeContainer
 from ..containers.common import Graph
@@ -36,13 +34,14 @@ class RDFRead(MDLRead):
     """
     MDL RDF files reader. works similar to opened file object. support `with` context manager.
     on initialization accept opened in text mode file, string path to file,
-    pathlib.Path object or another buffered reader object
+    pathlib.Path object or another buffered reader object.
+    Files with .gz, .bz2, .xz and .zst (requires zstandard) suffixes are decompressed on the fly.
     """
     def __init__(self, file, indexable=False, **kwargs):
         """
-        :param indexable: if True: supported methods seek, tell, object size and subscription, it only works when
-            dealing with a real file (the path to the file is specified) because the external grep utility is used,
-            supporting in unix-like OS the object behaves like a normal open file.
+        :param indexable: if True: supported methods seek, tell, object size and subscription. Works with files and
+            seekable buffers. Index of records is cached for files. See `reset_index`.
+            Compressed files are slow for random access except BGZF (.gz) and Zstandard seekable format (.zst).
 
             if False: works like generator converting a record into ReactionContainer and returning each object in
             order, records with errors are skipped
@@ -63,10 +62,9 @@ class RDFRead(MDLRead):
             next(self._data)
 
     @staticmethod
-    def _get_shifts(file):
-        shifts = [int(x.split(b':', 1)[0]) for x in
-                  check_output(['grep', '-boE', r'^\$[RM]FMT', file]).split()]
-        shifts.append(getsize(file))
+    def _get_shifts(file, **kwargs):
+        shifts = find_lines(file, (b'$RFMT', b'$MFMT'), **kwargs)
+        shifts.append(stream_size(file))
         return shifts
 
     def seek(self, offset):
@@ -303,16 +301,23 @@ class _RDFWrite:
         :param mapping: write atom mapping.
         """
         super().__init__(file, append=append, write3d=int(write3d), mapping=mapping)
-        if not append or not (self._is_buffer or self._file.tell() != 0):
-            self.write = self.__write
+        self.__header = not append or not (self._is_buffer or self._file.tell() != 0)
 
-    def __write(self, data):
+    def write(self, data):
         """
         write single molecule or reaction into file
         """
-        del self.write
-        self._file.write(strftime('$RDFILE 1\n$DATM    %m/%d/%y %H:%M\n'))
-        self.write(data)
+        self.__write_header()
+        super().write(data)
+
+    def write_many(self, data, batch_size=1000, processes=None):
+        self.__write_header()
+        super().write_many(data, batch_size, processes)
+
+    def __write_header(self):
+        if self.__header:
+            self._file.write(strftime('$RDFILE 1\n$DATM    %m/%d/%y %H:%M\n'))
+            self.__header = False
 
 
 class RDFWrite(_RDFWrite, MDLWrite):
@@ -321,22 +326,19 @@ class RDFWrite(_RDFWrite, MDLWrite):
     on initialization accept opened for writing in text mode file, string path to file,
     pathlib.Path object or another buffered writer object
     """
-    def write(self, data):
+    def _format_record(self, data):
         if isinstance(data, Graph):
-            m = self._convert_structure(data)
-            self._file.write('$MFMT\n')
-            self._file.write(m)
+            out = ['$MFMT\n', self._convert_structure(data)]
         elif isinstance(data, ReactionContainer):
             ag = f'{len(data.reagents):3d}' if data.reagents else ''
-            self._file.write(f'$RFMT\n$RXN\n{data.name}\n\n\n{len(data.reactants):3d}{len(data.products):3d}{ag}\n')
+            out = [f'$RFMT\n$RXN\n{data.name}\n\n\n{len(data.reactants):3d}{len(data.products):3d}{ag}\n']
             for m in chain(data.reactants, data.products, data.reagents):
-                m = self._convert_structure(m)
-                self._file.write('$MOL\n')
-                self._file.write(m)
+                out.append('$MOL\n')
+                out.append(self._convert_structure(m))
         else:
             raise TypeError('Graph or Reaction object expected')
-        for k, v in data.meta.items():
-            self._file.write(f'$DTYPE {k}\n$DATUM {v}\n')
+        out.extend(f'$DTYPE {k}\n$DATUM {v}\n' for k, v in data.meta.items())
+        return ''.join(out)
 
 
 class ERDFWrite(_RDFWrite, EMDLWrite):
@@ -345,32 +347,27 @@ class ERDFWrite(_RDFWrite, EMDLWrite):
     on initialization accept opened for writing in text mode file, string path to file,
     pathlib.Path object or another buffered writer object
     """
-    def write(self, data):
+    def _format_record(self, data):
         if isinstance(data, MoleculeContainer):
-            m = self._convert_structure(data)
-            self._file.write(f'$MFMT\n{data.name}\n\n\n  0  0  0     0  0            999 V3000\n')
-            self._file.write(m)
-            self._file.write('M  END\n')
+            out = [f'$MFMT\n{data.name}\n\n\n  0  0  0     0  0            999 V3000\n',
+                   self._convert_structure(data), 'M  END\n']
         elif isinstance(data, ReactionContainer):
             ag = f' {len(data.reagents)}' if data.reagents else ''
-            self._file.write(f'$RFMT\n$RXN V3000\n{data.name}\n\n\n'
-                             f'M  V30 COUNTS {len(data.reactants)} {len(data.products)}{ag}\nM  V30 BEGIN REACTANT\n')
-            for m in data.reactants:
-                self._file.write(self._convert_structure(m))
-            self._file.write('M  V30 END REACTANT\nM  V30 BEGIN PRODUCT\n')
-            for m in data.products:
-                self._file.write(self._convert_structure(m))
-            self._file.write('M  V30 END PRODUCT\n')
+            out = [f'$RFMT\n$RXN V3000\n{data.name}\n\n\n'
+                   f'M  V30 COUNTS {len(data.reactants)} {len(data.products)}{ag}\nM  V30 BEGIN REACTANT\n']
+            out.extend(self._convert_structure(m) for m in data.reactants)
+            out.append('M  V30 END REACTANT\nM  V30 BEGIN PRODUCT\n')
+            out.extend(self._convert_structure(m) for m in data.products)
+            out.append('M  V30 END PRODUCT\n')
             if data.reagents:
-                self._file.write('M  V30 BEGIN AGENT\n')
-                for m in data.reagents:
-                    self._file.write(self._convert_structure(m))
-                self._file.write('M  V30 END AGENT\n')
-            self._file.write('M  END\n')
+                out.append('M  V30 BEGIN AGENT\n')
+                out.extend(self._convert_structure(m) for m in data.reagents)
+                out.append('M  V30 END AGENT\n')
+            out.append('M  END\n')
         else:
             raise TypeError('Molecule or Reaction object expected')
-        for k, v in data.meta.items():
-            self._file.write(f'$DTYPE {k}\n$DATUM {v}\n')
+        out.extend(f'$DTYPE {k}\n$DATUM {v}\n' for k, v in data.meta.items())
+        return ''.join(out)
 
 
 class RDFread:
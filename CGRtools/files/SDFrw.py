@@ -18,15 +18,17 @@
 #
 from bisect import bisect_left
 from collections import defaultdict
-from io import BytesIO
 from logging import warning
 from re import match, compile
-from subprocess import check_output
 from traceback import format_exc
+from typing import Callable, Dict, List, Optional
 from warnings import warn
-from ._mdl import parse_error
+from ._mdl import common_isotopes, find_lines, parse_error
 from ._mdl import MDLRead, MDLWrite, MOLRead, EMOLRead, EMDLWrite
+from ..containers import MoleculeContainer
+from ..containers.bonds import Bond
 from ..exceptions import EmptyMolecule
+from ..periodictable import Element
 
 
 head = compile(r'>\s.*<(.*)>')
@@ -36,16 +38,21 @@ class SDFRead(MDLRead):
     """
     MDL SDF files reader. works similar to opened file object. support `with` context manager.
     on initialization accept opened in text mode file, string path to file,
-    pathlib.Path object or another buffered reader object
+    pathlib.Path object or another buffered reader object.
+    Files with .gz, .bz2, .xz and .zst (requires zstandard) suffixes are decompressed on the fly.
     """
-    def __init__(self, file, indexable=False, **kwargs):
+    def __init__(self, file, indexable=False, *, lazy: bool = False,
+                 where: Optional[Callable[[Dict[str, str]], bool]] = None, **kwargs):
         """
-        :param indexable: if True: supported methods seek, tell, object size and subscription, it only works when
-            dealing with a real file (the path to the file is specified) because the external grep utility is used,
-            supporting in unix-like OS the object behaves like a normal open file.
+        :param indexable: if True: supported methods seek, tell, object size and subscription. Works with files and
+            seekable buffers. Index of records is cached for files. See `reset_index`.
+            Compressed files are slow for random access except BGZF (.gz) and Zstandard seekable format (.zst).
 
             if False: works like generator converting a record into MoleculeContainer and returning each object in
             order, records with errors are skipped
+        :param lazy: return LazyRecord objects instead of containers. Molecule is built on first access.
+        :param where: predicate of record metadata. Structure of rejected records is not parsed.
+            Rejected records are skipped in iteration and slices. For indexed access None returned.
         :param ignore: Skip some checks of data or try to fix some errors.
         :param remap: Remap atom numbers started from one.
         :param store_log: Store parser log if exists messages to `.meta` by key `CGRtoolsParserLog`.
@@ -53,6 +60,8 @@ class SDFRead(MDLRead):
         :param ignore_stereo: Ignore stereo data.
         """
         super().__init__(file, **kwargs)
+        self.__lazy = lazy
+        self.__where = where
         self.__file = iter(self._file.readline, '')
         self._data = self.__reader()
         next(self._data)
@@ -61,11 +70,9 @@ class SDFRead(MDLRead):
             self._load_cache()
 
     @staticmethod
-    def _get_shifts(file):
+    def _get_shifts(file, **kwargs):
         shifts = [0]
-        for x in BytesIO(check_output(['grep', '-bE', r'\$\$\$\$', file])):
-            pos, line = x.split(b':', 1)
-            shifts.append(int(pos) + len(line))
+        shifts.extend(find_lines(file, (b'$$$$',), True, **kwargs))
         return shifts
 
     def seek(self, offset):
@@ -107,10 +114,7 @@ class SDFRead(MDLRead):
         raise self._implement_error
 
     def __reader(self):
-        im = 3
-        failkey = False
-        mkey = parser = record = None
-        meta = defaultdict(list)
+        lines = []
         file = self._file
         seekable = file.seekable()
         seek = yield  # init stop
@@ -123,122 +127,294 @@ class SDFRead(MDLRead):
             pos = 0 if seekable else None
             count = 0
         for line in self.__file:
-            if failkey and not line.startswith("$$$$"):
+            if not line.startswith('$$$$'):
+                lines.append(line)
                 continue
-            elif parser:
-                try:
-                    if parser(line):
-                        record = parser.getvalue()
-                        parser = None
-                except ValueError:
-                    parser = None
-                    self._info(f'line:\n{line}\nconsist errors:\n{format_exc()}')
-                    seek = yield parse_error(count, pos, self._format_log(), {})
-                    if seek is not None:  # seeked to start of mol block
-                        yield
-                        count = seek
-                        pos = file.tell()
-                        im = 3
-                        mkey = None
-                        meta = defaultdict(list)
-                        self.__already_seeked = False
-                    else:
-                        failkey = True
+            record, lines = lines, []
+            if len(record) >= 4:  # skip records without molecule block
+                seek = yield self.__parse_record(record, count, pos)
+                if seek is not None:  # seeked position
+                    yield
+                    count = seek
+                    pos = file.tell()
+                    self.__already_seeked = False
                     self._flush_log()
-            elif line.startswith("$$$$"):
-                if record:
-                    record['meta'].update(self._prepare_meta(meta))
-                    if title:
-                        record['title'] = title
+                    continue
+            self._flush_log()
+            if seekable:
+                pos = file.tell()
+            count += 1
+
+        if len(lines) >= 4:  # MOL file or last record without separator
+            record = self.__parse_record(lines, count, pos)
+            self._flush_log()
+            yield record
+
+    def __parse_record(self, lines, count, pos):
+        """
+        Container, LazyRecord or parse_error from lines of record. None for records rejected by predicate.
+        """
+        if self.__where is not None:
+            meta = self.__parse_meta(lines)
+            if not self.__where(meta):
+                return
+        else:
+            meta = None
+        if self.__lazy:
+            return LazyRecord(self, lines, count, pos, meta)
+        return self.__parse_molecule(lines, count, pos, meta)
+
+    def __parse_molecule(self, lines, count, pos, meta=None):
+        line = lines[3]
+        log_size = len(self._log_buffer)
+        try:
+            parsed = self.__parse_v2000(lines) if 'V2000' in line else None
+        except (ValueError, KeyError, IndexError):  # errors described by generic parser
+            del self._log_buffer[log_size:]
+            parsed = None
+
+        if parsed is None:
+            container = None
+            try:
+                if 'V2000' in line:
                     try:
-                        container = self._convert_structure(record)
-                    except ValueError:
-                        self._info(f'record consist errors:\n{format_exc()}')
-                        seek = yield parse_error(count, pos, self._format_log(), record['meta'])
-                    else:
-                        if self._store_log:
-                            log = self._format_log()
-                            if log:
-                                container.meta['CGRtoolsParserLog'] = log
-                        seek = yield container
-                    if seek is not None:  # seeked position
-                        yield
-                        count = seek - 1
-                        self.__already_seeked = False
-                    self._flush_log()
-                    record = None
+                        parser = MOLRead(line, self._log_buffer)
+                    except EmptyMolecule:
+                        if self._ignore:
+                            parser = EMOLRead(self._log_buffer)
+                            self._info(f'line:\n{line}\nconsist errors:\nempty atoms list. try to parse as V3000')
+                        else:
+                            raise
+                elif 'V3000' in line:
+                    parser = EMOLRead(self._log_buffer)
+                else:
+                    raise ValueError('invalid MOL entry')
+            except ValueError:
+                self._info(f'line:\n{line}\nconsist errors:\n{format_exc()}')
+                return parse_error(count, pos, self._format_log(), {})
 
-                if seekable:
-                    pos = file.tell()
-                count += 1
-                im = 3
-                failkey = False
-                mkey = None
-                meta = defaultdict(list)
-            elif record:
-                head_line = match(head, line)
-                if head_line:
-                    mkey = head_line.group(1).strip()
-                    if not mkey:
-                        self._info(f'invalid metadata entry: {line}')
-                elif mkey:
-                    data = line.strip()
-                    if data:
-                        meta[mkey].append(data)
-            elif im:
-                if im == 3:  # parse mol title
-                    title = line.strip()
-                im -= 1
-            elif not im:
+            for end, line in enumerate(lines[4:], 5):
                 try:
-                    if 'V2000' in line:
-                        try:
-                            parser = MOLRead(line, self._log_buffer)
-                        except EmptyMolecule:
-                            if self._ignore:
-                                parser = EMOLRead(self._log_buffer)
-                                self._info(f'line:\n{line}\nconsist errors:\nempty atoms list. try to parse as V3000')
-                            else:
-                                raise
-                    elif 'V3000' in line:
-                        parser = EMOLRead(self._log_buffer)
-                    else:
-                        raise ValueError('invalid MOL entry')
+                    if parser(line):
+                        record = parser.getvalue()
+                        break
                 except ValueError:
                     self._info(f'line:\n{line}\nconsist errors:\n{format_exc()}')
-                    seek = yield parse_error(count, pos, self._format_log(), {})
-                    if seek is not None:  # seeked to start of mol block
-                        yield
-                        count = seek
-                        pos = file.tell()
-                        im = 3
-                        mkey = None
-                        meta = defaultdict(list)
-                        self.__already_seeked = False
-                    else:
-                        failkey = True
-                    self._flush_log()
+                    return parse_error(count, pos, self._format_log(), {})
+            else:
+                self._info('molecule block not complete')
+                return parse_error(count, pos, self._format_log(), {})
+        else:
+            container, end = parsed
 
-        if record:  # True for MOL file only.
-            record['meta'].update(self._prepare_meta(meta))
+        if meta is None:
+            meta = self.__parse_meta(lines, end)
+        title = lines[0].strip()
+
+        if container is None:
+            record['meta'].update(meta)
             if title:
                 record['title'] = title
             try:
                 container = self._convert_structure(record)
             except ValueError:
                 self._info(f'record consist errors:\n{format_exc()}')
-                log = self._format_log()
-                self._flush_log()
-                yield parse_error(count, pos, log, record['meta'])
+                return parse_error(count, pos, self._format_log(), record['meta'])
+        else:
+            container.meta.update(meta)
+            if title:
+                container.name = title
+
+        if self._store_log:
+            log = self._format_log()
+            if log:
+                container.meta['CGRtoolsParserLog'] = log
+        return container
+
+    def __parse_meta(self, lines, end=None):
+        """
+        Metadata of record. Data fields are placed after molecule block ended on `end` line.
+        """
+        if end is None:
+            for end in range(4, len(lines)):
+                if lines[end].startswith('M  END'):
+                    end += 1
+                    break
+            else:
+                return {}
+        meta = defaultdict(list)
+        mkey = None
+        for line in lines[end:]:
+            head_line = line.startswith('>') and match(head, line)
+            if head_line:
+                mkey = head_line.group(1).strip()
+                if not mkey:
+                    self._info(f'invalid metadata entry: {line}')
+            elif mkey:
+                data = line.strip()
+                if data:
+                    meta[mkey].append(data)
+        return self._prepare_meta(meta)
+
+    def _lazy_meta(self, record: 'LazyRecord') -> Dict[str, str]:
+        buffer = self._log_buffer
+        self._log_buffer = []
+        try:
+            return self.__parse_meta(record._lines)
+        finally:
+            self._log_buffer = buffer
+
+    def _lazy_molecule(self, record: 'LazyRecord') -> MoleculeContainer:
+        buffer = self._log_buffer
+        self._log_buffer = []
+        try:
+            molecule = self.__parse_molecule(record._lines, record.number, record.position, record.meta)
+        finally:
+            self._log_buffer = buffer
+        if isinstance(molecule, parse_error):
+            raise ValueError(f'record {record.number} consist errors:\n{molecule.log}')
+        return molecule
+
+    def __parse_v2000(self, lines):
+        """
+        Molecule and index of line next to `M  END` from V2000 molecule block.
+        Atoms and bonds tables are sliced by fixed columns at once.
+        None returned for blocks with CGR, query or other unsupported by fast parser data.
+        """
+        counts = lines[3]
+        atoms_count = int(counts[0:3])
+        if not atoms_count:
+            return
+        start = atoms_count + 4
+        stop = start + int(counts[3:6])
+        for end in range(stop, len(lines)):
+            line = lines[end]
+            if line.startswith('M  END'):
+                break
+            elif not line.startswith(('M  CHG', 'M  RAD', 'M  ISO')):
+                return
+        else:
+            return
+
+        properties = {'C': {}, 'R': {}, 'I': {}}
+        for line in lines[stop:end]:
+            data = properties[line[3]]
+            for i in range(int(line[6:9])):
+                i8 = i * 8
+                atom = int(line[10 + i8:13 + i8])
+                if not atom or atom > atoms_count:
+                    raise ValueError('invalid atoms number')
+                data[atom - 1] = int(line[14 + i8:17 + i8])
+
+        bonds_table = []
+        stereo = []
+        for line in lines[start:stop]:
+            n, m = int(line[0:3]) - 1, int(line[3:6]) - 1
+            s = line[9:12]
+            if s == '  1':
+                stereo.append((n, m, 1))
+            elif s == '  6':
+                stereo.append((n, m, -1))
+            elif s != '  0':
+                self._info('unsupported or invalid stereo')
+            b = int(line[6:9])
+            bonds_table.append((n, m, Bond(b if b != 9 else 8)))
+
+        atoms_lines = lines[4:start]
+        parsed = [int(line[60:63] or 0) for line in atoms_lines]
+        mapping = self._molecule_mapping(parsed)
+
+        mol = object.__new__(self.MoleculeContainer)
+        validate_charge = mol._validate_charge
+        charge_map = self.__charge_map
+        p_charges = properties['C']
+        p_radicals = properties['R']
+        p_isotopes = properties['I']
+        atoms = {}
+        bonds = {}
+        charges = {}
+        radicals = {}
+        plane = {}
+        pm = {}
+        xyz = {}
+        for i, line in enumerate(atoms_lines):
+            n = mapping[i]
+            element = line[31:34].strip()
+            if i in p_isotopes:
+                isotope = p_isotopes[i]
             else:
-                if self._store_log:
-                    log = self._format_log()
-                    if log:
-                        container.meta['CGRtoolsParserLog'] = log
-                self._flush_log()
-                yield container
+                isotope = line[34:36]
+                isotope = None if isotope == ' 0' else common_isotopes[element] + int(isotope)
+            atoms[n] = Element.from_symbol(element)(isotope)
+            bonds[n] = {}
+            charges[n] = validate_charge(p_charges[i] if i in p_charges else charge_map[line[36:39]])
+            radicals[n] = bool(p_radicals.get(i))
+            xyz[n] = x, y, _ = float(line[0:10]), float(line[10:20]), float(line[20:30])
+            plane[n] = (x, y)
+            pm[n] = parsed[i]
+
+        for n, m, b in bonds_table:
+            n, m = mapping[n], mapping[m]
+            if n == m:
+                raise ValueError('atom loops impossible')
+            if n in bonds[m]:
+                raise ValueError('atoms already bonded')
+            bonds[n][m] = bonds[m][n] = b
+
+        mol.__setstate__({'atoms': atoms, 'bonds': bonds, 'meta': {}, 'plane': plane, 'parsed_mapping': pm,
+                          'charges': charges, 'radicals': radicals, 'name': '',
+                          'conformers': [xyz] if any(z for _, _, z in xyz.values()) else [],
+                          'atoms_stereo': {}, 'allenes_stereo': {}, 'cis_trans_stereo': {}})
+        self._set_stereo(mol, [(mapping[n], mapping[m], s) for n, m, s in stereo])
+        return mol, end + 1
 
     __already_seeked = False
+    __lazy = False
+    __where = None
+    __charge_map = {'  0': 0, '  1': 3, '  2': 2, '  3': 1, '  4': 0, '  5': -1, '  6': -2, '  7': -3}
+
+
+class LazyRecord:
+    """
+    Record of SDF file parsed on demand. Metadata parsed on first access of `meta`,
+    molecule built on first access of `molecule`. Record is bound to opened reader.
+    """
+    __slots__ = ('number', 'position', 'name', '_lines', '__reader', '__meta', '__molecule')
+
+    def __init__(self, reader: SDFRead, lines: List[str], number: int, position: Optional[int],
+                 meta: Optional[Dict[str, str]] = None):
+        """
+        :param number: number of record in file
+        :param position: position of record in file
+        """
+        self.number = number
+        self.position = position
+        self.name = lines[0].strip()
+        self._lines = lines
+        self.__reader = reader
+        self.__meta = meta
+        self.__molecule = None
+
+    @property
+    def meta(self) -> Dict[str, str]:
+        """
+        Data fields of record.
+        """
+        if self.__meta is None:
+            self.__meta = self.__reader._lazy_meta(self)
+        return self.__meta
+
+    @property
+    def molecule(self) -> MoleculeContainer:
+        """
+        Molecule of record. ValueError raised for invalid records.
+        """
+        if self.__molecule is None:
+            self.__molecule = self.__reader._lazy_molecule(self)
+        return self.__molecule
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.number})'
 
 
 class SDFWrite(MDLWrite):
@@ -247,19 +423,12 @@ class SDFWrite(MDLWrite):
     on initialization accept opened for writing in text mode file, string path to file,
     pathlib.Path object or another buffered writer object
     """
-    def write(self, data):
-        """
-        write single molecule into file
-        """
+    def _format_record(self, data):
         mol = self._convert_structure(data)
-        if isinstance(mol, list):
-            self._file.write('$$$$\n'.join(mol))
-        else:
-            self._file.write(mol)
-
-        for k, v in data.meta.items():
-            self._file.write(f'>  <{k}>\n{v}\n')
-        self._file.write('$$$$\n')
+        out = ['$$$$\n'.join(mol) if isinstance(mol, list) else mol]
+        out.extend(f'>  <{k}>\n{v}\n' for k, v in data.meta.items())
+        out.append('$$$$\n')
+        return ''.join(out)
 
 
 class ESDFWrite(EMDLWrite):
@@ -268,21 +437,17 @@ class ESDFWrite(EMDLWrite):
     on initialization accept opened for writing in text mode file, string path to file,
     pathlib.Path object or another buffered writer object
     """
-    def write(self, data):
-        """
-        write single molecule into file
-        """
+    def _format_record(self, data):
         mol = self._convert_structure(data)
-        self._file.write(f'{data.name}\n\n\n  0  0  0     0  0            999 V3000\n')
+        out = [f'{data.name}\n\n\n  0  0  0     0  0            999 V3000\n']
         if isinstance(mol, list):
-            self._file.write(f'M  END\n$$$$\n{data.name}\n\n\n  0  0  0     0  0            999 V3000\n'.join(mol))
+            out.append(f'M  END\n$$$$\n{data.name}\n\n\n  0  0  0     0  0            999 V3000\n'.join(mol))
         else:
-            self._file.write(mol)
-        self._file.write('M  END\n')
-
-        for k, v in data.meta.items():
-            self._file.write(f'>  <{k}>\n{v}\n')
-        self._file.write('$$$$\n')
+            out.append(mol)
+        out.append('M  END\n')
+        out.extend(f'>  <{k}>\n{v}\n' for k, v in data.meta.items())
+        out.append('$$$$\n')
+        return ''.join(out)
 
 
 class SDFread:
@@ -329,4 +494,4 @@ class SDFwrite:
         return self.__obj.__exit__(_type, value, traceback)
 
 
-__all__ = ['SDFRead', 'SDFWrite', 'ESDFWrite', 'SDFread', 'SDFwrite']
+__all__ = ['SDFRead', 'LazyRecord', 'SDFWrite', 'ESDFWrite', 'SDFread', 'SDFwrite']
@@ -18,7 +18,7 @@
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
 from collections import defaultdict
-from functools import reduce
+from functools import lru_cache, reduce
 from itertools import permutations, chain
 from io import StringIO, TextIOWrapper
 from logging import warning
@@ -26,9 +26,10 @@ from operator import or_
 from pathlib import Path
 from re import split, compile, fullmatch, findall, search
 from traceback import format_exc
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Optional, Sequence
 from warnings import warn
-from ._mdl import CGRRead, parse_error
+from ._compressed import open_text
+from ._mdl import CGRRead, parse_error, _BatchWrite
 from ..containers import MoleculeContainer, CGRContainer, ReactionContainer
 from ..exceptions import IncorrectSmiles, IsChiral, NotChiral, ValenceError
 
@@ -77,6 +78,7 @@ class SMILESRead(CGRRead):
     """SMILES separated per lines files reader. Works similar to opened file object. Support `with` context manager.
     On initialization accept opened in text mode file, string path to file,
     pathlib.Path object or another buffered reader object.
+    Files with .gz, .bz2, .xz and .zst (requires zstandard) suffixes are decompressed on the fly.
 
     Line should be start with SMILES string and optionally continues with space/tab separated list of
     `key:value` [or `key=value`] data if `header=None`. For example::
@@ -101,11 +103,8 @@ class SMILESRead(CGRRead):
         :param store_log: Store parser log if exists messages to `.meta` by key `CGRtoolsParserLog`.
         :param ignore_stereo: Ignore stereo data.
         """
-        if isinstance(file, str):
-            self._file = open(file)
-            self.__is_buffer = False
-        elif isinstance(file, Path):
-            self._file = file.open()
+        if isinstance(file, (str, Path)):
+            self._file = open_text(file)
             self.__is_buffer = False
         elif isinstance(file, (TextIOWrapper, StringIO)):
             self._file = file
@@ -582,8 +581,18 @@ class SMILESRead(CGRRead):
                 out.append((token_type, token))
         return out
 
+    @classmethod
+    def __atom_parse(cls, token):
+        _type, element, charge, isotope, mapping, hydrogen, stereo = cls.__bracket_atom(token)
+        return _type, {'element': element, 'charge': charge, 'isotope': isotope, 'is_radical': False,
+                       'mapping': mapping, 'x': 0., 'y': 0., 'z': 0., 'hydrogen': hydrogen, 'stereo': stereo}
+
     @staticmethod
-    def __atom_parse(token):
+    @lru_cache(4096)
+    def __bracket_atom(token):
+        """
+        Parsed atom token. Cached for reusing of common tokens like [nH] or [O-].
+        """
         # [isotope]Element[element][@[@]][H[n]][+-charge][:mapping]
         match = fullmatch(atom_re, token)
         if match is None:
@@ -625,8 +634,7 @@ class SMILESRead(CGRRead):
             element = element.capitalize()
         else:
             _type = 0
-        return _type, {'element': element, 'charge': charge, 'isotope': isotope, 'is_radical': False,
-                       'mapping': mapping, 'x': 0., 'y': 0., 'z': 0., 'hydrogen': hydrogen, 'stereo': stereo}
+        return _type, element, charge, isotope, mapping, hydrogen, stereo
 
     @staticmethod
     def __dynatom_parse(token):
@@ -828,6 +836,74 @@ class SMILESRead(CGRRead):
         return mol
 
 
+class SMILESWrite(_BatchWrite):
+    """
+    SMILES files writer. Works similar to opened for writing file object. Support `with` context manager.
+    On initialization accept opened for writing in text mode file, string path to file,
+    pathlib.Path object or another buffered writer object.
+
+    Each line contains canonical SMILES of molecule, CGR or reaction and metadata in format readable by
+    SMILESRead. Metadata values with spaces or tabs are not supported. In header mode records can miss
+    values of last keys of header.
+    """
+    def __init__(self, file, header: Optional[Sequence[str]] = None, *, append: bool = False):
+        """
+        :param header: list of metadata keys. If given, first line of file contains `smiles` pseudo key and keys,
+            and values of these keys are written in order. Otherwise all metadata written as `key:value` pairs.
+            Files with header should be read with `header=True` option.
+        :param append: append to existing file (True) or rewrite it (False).
+        """
+        if isinstance(file, (str, Path)):
+            self._file = open(file, 'a' if append else 'w')
+            self.__is_buffer = False
+        elif isinstance(file, (TextIOWrapper, StringIO)):
+            self._file = file
+            self.__is_buffer = True
+        else:
+            raise TypeError('invalid file. TextIOWrapper, StringIO subclasses possible')
+
+        if header is not None:
+            if not isinstance(header, (list, tuple)) or not all(isinstance(x, str) for x in header):
+                raise TypeError('expected list (tuple) of strings')
+            if not append or not (self.__is_buffer or self._file.tell() != 0):
+                self._file.write(' '.join(('smiles', *header)) + '\n')
+            self.__header = tuple(header)
+        else:
+            self.__header = None
+
+    def close(self, force=False):
+        """
+        Close opened file.
+
+        :param force: Force closing of externally opened file or buffer.
+        """
+        self._close_writer()
+        if not self.__is_buffer or force:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        self.close()
+
+    def _format_record(self, data):
+        if not isinstance(data, (MoleculeContainer, CGRContainer, ReactionContainer)):
+            raise TypeError('Molecule, CGR or Reaction object expected')
+        meta = data.meta
+        if self.__header is None:
+            values = [f'{k}:{v}' for k, v in meta.items()]
+        else:
+            values = [str(meta.get(k, '')) for k in self.__header]
+            while values and not values[-1]:  # missing in the end values skipped. reader also skips them
+                values.pop()
+            if not all(values):
+                raise ValueError('metadata values of header keys can be missing only in the end')
+        if any(len(x.split()) != 1 for x in values):
+            raise ValueError('metadata keys and values should be non-empty and without spaces')
+        return ' '.join((str(data), *values)) + '\n'
+
+
 class SMILESread:
     def __init__(self, *args, **kwargs):
         warn('SMILESread deprecated. Use SMILESRead instead', DeprecationWarning)
@@ -850,4 +926,4 @@ class SMILESread:
         return self.__obj.__exit__(_type, value, traceback)
 
 
-__all__ = ['SMILESRead', 'SMILESread']
+__all__ = ['SMILESRead', 'SMILESWrite', 'SMILESread']
@@ -18,6 +18,7 @@
 #
 from .INCHIrw import *
 from .MRVrw import *
+from .PACKrw import *
 from .PDBrw import *
 from .RDFrw import *
 from .SDFrw import *
@@ -26,3 +27,4 @@ from .XYZrw import *
 
 
 __all__ = [x for x in locals() if x.endswith(('Read', 'Write'))]
+__all__.append('PackedMoleculeDB')
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from bisect import bisect_right
+from bz2 import BZ2File
+from gzip import GzipFile
+from importlib.util import find_spec
+from io import BufferedIOBase, BufferedReader, RawIOBase, TextIOWrapper, SEEK_CUR, SEEK_END, SEEK_SET
+from lzma import LZMAFile
+from pathlib import Path
+from struct import Struct
+from typing import List, Tuple, Union
+from zlib import decompress
+
+
+if find_spec('zstandard'):
+    from zstandard import ZstdDecompressor
+else:
+    ZstdDecompressor = None
+
+gzip_header = Struct('<4BI2BH')  # ID1, ID2, CM, FLG, MTIME, XFL, OS, XLEN
+subfield_header = Struct('<2BH')  # SI1, SI2, SLEN
+seek_table_footer = Struct('<IBI')  # frames count, descriptor, magic number
+seekable_magic = 0x8F92EAB1
+compressed_suffixes = ('.gz', '.bz2', '.xz', '.zst')
+
+
+class BlockCompressedFile(BufferedIOBase):
+    """
+    Read-only binary file of independently compressed blocks with random access.
+    Only one block is decompressed on seek and read.
+    """
+    _file = None
+
+    def __init__(self, path: Union[str, Path]):
+        self.name = str(path)
+        self._file = open(path, 'rb')
+        try:
+            self._blocks, self._starts = self._read_table()
+        except Exception:
+            self._file.close()
+            raise
+        self._position = 0
+        self._block = -1
+        self._data = b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            offset += self._position
+        elif whence == SEEK_END:
+            offset += self._starts[-1]
+        elif whence != SEEK_SET:
+            raise ValueError('invalid whence')
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self._position = offset
+        return offset
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._starts[-1] - self._position
+        out = []
+        while size > 0:
+            data = self.read1(size)
+            if not data:
+                break
+            out.append(data)
+            size -= len(data)
+        return b''.join(out)
+
+    def read1(self, size=-1):
+        data, shift = self.__load()
+        if size is None or size < 0:
+            size = len(data)
+        data = data[shift: shift + size]
+        self._position += len(data)
+        return data
+
+    def readline(self, size=-1):
+        out = []
+        while size:
+            data, shift = self.__load()
+            if shift >= len(data):
+                break
+            end = data.find(b'\n', shift) + 1 or len(data)
+            if 0 < size < end - shift:
+                end = shift + size
+            out.append(data[shift:end])
+            self._position += end - shift
+            if data[end - 1] == 10:  # newline found
+                break
+            size -= end - shift
+        return b''.join(out)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        super().close()
+
+    def __load(self) -> Tuple[bytes, int]:
+        """
+        Decompressed block containing current position and position in block.
+        """
+        position = self._position
+        block = bisect_right(self._starts, position) - 1
+        if block >= len(self._blocks):  # end of file
+            return b'', 0
+        if block != self._block:
+            start, size = self._blocks[block]
+            self._file.seek(start)
+            self._data = self._decompress(self._file.read(size), self._starts[block + 1] - self._starts[block])
+            self._block = block
+        return self._data, position - self._starts[block]
+
+    def _read_table(self) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """
+        Compressed blocks positions and sizes and decompressed blocks starts including end of data.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _decompress(data: bytes, size: int) -> bytes:
+        raise NotImplementedError
+
+
+class BGZFFile(BlockCompressedFile):
+    """
+    Blocked GNU Zip Format file reader. Such files are created by `bgzip` utility of htslib.
+    """
+    def _read_table(self):
+        file = self._file
+        blocks = []
+        starts = [0]
+        position = 0
+        while True:
+            header = file.read(gzip_header.size)
+            if not header:
+                break
+            block_size = _bgzf_block_size(header, file)
+            if block_size is None:
+                raise ValueError('invalid BGZF block')
+            file.seek(position + block_size - 4)
+            data_size = int.from_bytes(file.read(4), 'little')
+            if data_size:  # skip empty blocks. e.g. EOF marker
+                blocks.append((position, block_size))
+                starts.append(starts[-1] + data_size)
+            position += block_size
+            file.seek(position)
+        return blocks, starts
+
+    @staticmethod
+    def _decompress(data, size):
+        return decompress(data, 31)
+
+
+class ZstdSeekableFile(BlockCompressedFile):
+    """
+    Zstandard seekable format file reader. Seek table of frames stored in the end of file.
+    """
+    def _read_table(self):
+        file = self._file
+        file.seek(-seek_table_footer.size, SEEK_END)
+        count, descriptor, magic = seek_table_footer.unpack(file.read(seek_table_footer.size))
+        if magic != seekable_magic:
+            raise ValueError('seek table not found')
+        entry = Struct('<3I' if descriptor & 0x80 else '<2I')
+        file.seek(-seek_table_footer.size - entry.size * count, SEEK_END)
+        table = file.read(entry.size * count)
+
+        blocks = []
+        starts = [0]
+        position = 0
+        for compressed_size, data_size, *_ in entry.iter_unpack(table):
+            if data_size:
+                blocks.append((position, compressed_size))
+                starts.append(starts[-1] + data_size)
+            position += compressed_size
+        return blocks, starts
+
+    @staticmethod
+    def _decompress(data, size):
+        return ZstdDecompressor().decompress(data, max_output_size=size)
+
+
+class ZstdStreamFile(RawIOBase):
+    """
+    Zstandard plain stream file reader. Forward seek skips decompressed data.
+    Backward seek reopens stream and skips data from the start.
+    """
+    _file = None
+
+    def __init__(self, path: Union[str, Path]):
+        self.name = str(path)
+        self._size = None
+        self.__open()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            offset += self._position
+        elif whence == SEEK_END:
+            if self._size is None:  # decompress till the end
+                self.__skip(-1)
+                self._size = self._position
+            offset += self._size
+        elif whence != SEEK_SET:
+            raise ValueError('invalid whence')
+        if offset < 0:
+            raise ValueError('negative seek position')
+        if offset < self._position:
+            self.__open()
+        self.__skip(offset)
+        return self._position
+
+    def readinto(self, b):
+        size = self._file.readinto(b)
+        self._position += size
+        return size
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        super().close()
+
+    def __open(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = ZstdDecompressor().stream_reader(open(self.name, 'rb'), read_across_frames=True, closefd=True)
+        self._position = 0
+
+    def __skip(self, offset):
+        """
+        Skip decompressed data till given position. Negative position means the end of stream.
+        """
+        while offset < 0 or self._position < offset:
+            data = self._file.read(1 << 20 if offset < 0 else min(offset - self._position, 1 << 20))
+            if not data:
+                break
+            self._position += len(data)
+
+
+def open_binary(path: Union[str, Path]) -> BufferedIOBase:
+    """
+    Open file in binary mode. Compressed files detected by .gz, .bz2, .xz and .zst suffixes.
+    BGZF and Zstandard seekable files support fast random access. Other compressed files are decompressed from the
+    start on backward seek.
+    """
+    path = str(path)
+    if path.endswith('.gz'):
+        with open(path, 'rb') as file:
+            is_bgzf = _bgzf_block_size(file.read(gzip_header.size), file) is not None
+        return BGZFFile(path) if is_bgzf else GzipFile(path, 'rb')
+    elif path.endswith('.bz2'):
+        return BZ2File(path, 'rb')
+    elif path.endswith('.xz'):
+        return LZMAFile(path, 'rb')
+    elif path.endswith('.zst'):
+        if ZstdDecompressor is None:
+            raise ImportError('zstandard required')
+        try:
+            return ZstdSeekableFile(path)
+        except ValueError:  # not seekable format
+            return BufferedReader(ZstdStreamFile(path))
+    return open(path, 'rb')
+
+
+def open_text(path: Union[str, Path]) -> TextIOWrapper:
+    """
+    Open file in text mode. See `open_binary`.
+    """
+    if str(path).endswith(compressed_suffixes):
+        return TextIOWrapper(open_binary(path))
+    return open(path)
+
+
+def _bgzf_block_size(header: bytes, file):
+    """
+    Total size of BGZF block or None for other files. File position should be after header.
+    """
+    if len(header) != gzip_header.size:
+        return
+    id1, id2, cm, flg, _, _, _, xlen = gzip_header.unpack(header)
+    if id1 != 31 or id2 != 139 or cm != 8 or not flg & 4:
+        return
+    extra = file.read(xlen)
+    shift = 0
+    while shift + subfield_header.size <= len(extra):
+        si1, si2, slen = subfield_header.unpack_from(extra, shift)
+        shift += subfield_header.size
+        if si1 == 66 and si2 == 67 and slen == 2:  # BC subfield
+            return int.from_bytes(extra[shift: shift + 2], 'little') + 1
+        shift += slen
+
+
+__all__ = ['BGZFFile', 'ZstdSeekableFile', 'ZstdStreamFile', 'open_binary', 'open_text']
@@ -19,9 +19,10 @@
 from .emol import EMOLRead
 from .erxn import ERXNRead
 from .ewrite import EMDLWrite
+from .index import find_lines, stream_size
 from .mol import MOLRead, common_isotopes
 from .parser import CGRRead, parse_error
 from .rxn import RXNRead
 from .stereo import MDLStereo
-from .rw import MDLRead
+from .rw import MDLRead, _BatchWrite
 from .write import MDLWrite
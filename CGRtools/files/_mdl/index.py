@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from io import FileIO, StringIO, TextIOWrapper, UnsupportedOperation
+from mmap import mmap, ACCESS_READ
+from multiprocessing import Pool
+from os import fstat
+from typing import Callable, List, Optional, Tuple
+
+
+block_size = 1 << 24  # 16 MiB
+
+
+def find_lines(file, prefixes: Tuple[bytes, ...], line_end: bool = False, *, processes: Optional[int] = None,
+               progress: Optional[Callable[[int, int], None]] = None) -> List[int]:
+    """
+    Positions of lines started with given prefixes. Memory usage is bounded by block size and positions list.
+
+    Uncompressed files are memory-mapped and scanned with `find` in blocks, optionally in worker processes.
+    Any other seekable stream is read in blocks aligned to lines.
+
+    :param file: opened file or buffer. For text streams positions are suitable for `seek` method.
+    :param prefixes: lines prefixes
+    :param line_end: return positions of lines ends (start of next line) instead of starts.
+    :param processes: number of worker processes for real files scanning. By default scan in current process.
+    :param progress: callback receiving number of scanned and total bytes.
+    """
+    if isinstance(file, StringIO):  # positions are characters indices
+        data = file.getvalue()
+        positions = _find(data, 0, len(data), tuple(x.decode() for x in prefixes), line_end)
+        if progress:
+            progress(len(data), len(data))
+        return positions
+    elif isinstance(file, TextIOWrapper):
+        file = file.buffer
+    if not file.seekable():
+        raise UnsupportedOperation('seekable stream required')
+
+    if not isinstance(getattr(file, 'raw', file), FileIO):  # BytesIO, compressed files and similar
+        return _find_stream(file, prefixes, line_end, progress)
+    fileno = file.fileno()
+    size = fstat(fileno).st_size
+    if not size:
+        return []
+
+    ranges = [(x, min(x + block_size, size)) for x in range(0, size, block_size)]
+    positions = []
+    if processes and processes > 1 and len(ranges) > 1:
+        with Pool(processes) as pool:
+            for (_, stop), chunk in zip(ranges, pool.imap(_find_range, ((file.name, start, stop, prefixes, line_end)
+                                                                        for start, stop in ranges))):
+                positions.extend(chunk)
+                if progress:
+                    progress(stop, size)
+    else:
+        with mmap(fileno, 0, access=ACCESS_READ) as data:
+            for start, stop in ranges:
+                positions.extend(_find(data, start, stop, prefixes, line_end))
+                if progress:
+                    progress(stop, size)
+    return positions
+
+
+def stream_size(file) -> int:
+    """
+    Size of file or buffer in units of `seek` positions.
+    """
+    if isinstance(file, StringIO):
+        return len(file.getvalue())
+    elif isinstance(file, TextIOWrapper):
+        file = file.buffer
+    current = file.tell()
+    size = file.seek(0, 2)
+    file.seek(current)
+    return size
+
+
+def _find_range(task):
+    path, start, stop, prefixes, line_end = task
+    with open(path, 'rb') as file, mmap(file.fileno(), 0, access=ACCESS_READ) as data:
+        return _find(data, start, stop, prefixes, line_end)
+
+
+def _find_stream(file, prefixes, line_end, progress):
+    current = file.tell()
+    size = file.seek(0, 2)
+    file.seek(0)
+    positions = []
+    shift = 0
+    while True:
+        data = file.read(block_size)
+        if not data:
+            break
+        data += file.readline()  # block should contain whole lines
+        positions.extend(x + shift for x in _find(data, 0, len(data), prefixes, line_end))
+        shift += len(data)
+        if progress:
+            progress(shift, size)
+    file.seek(current)
+    return positions
+
+
+def _find(data, start: int, stop: int, prefixes, line_end: bool) -> List[int]:
+    """
+    Positions of lines started in [start, stop) range of data.
+    """
+    newline = '\n' if isinstance(data, str) else b'\n'
+    find = data.find
+    positions = []
+    for prefix in prefixes:
+        if not start and data[:len(prefix)] == prefix:
+            positions.append(0)
+        prefix = newline + prefix
+        end = stop - 2 + len(prefix)  # lines started before stop
+        i = find(prefix, start - 1 if start else 0, end)
+        while i != -1:
+            positions.append(i + 1)
+            i = find(prefix, i + 1, end)
+    if len(prefixes) > 1:
+        positions.sort()
+    if line_end:
+        size = len(data)
+        for n, i in enumerate(positions):
+            i = find(newline, i)
+            positions[n] = size if i == -1 else i + 1
+    return positions
+
+
+__all__ = ['find_lines', 'stream_size']
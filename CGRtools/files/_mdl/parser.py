@@ -122,28 +122,33 @@ class CGRRead:
         return ReactionContainer(meta=reaction['meta'], name=reaction.get('title'), **rc)
 
     def _convert_structure(self, molecule):
-        if self.__remap:
-            remapped = {n: k for n, k in enumerate(range(1, len(molecule['atoms']) + 1))}
-        else:
-            length = count(max(x['mapping'] for x in molecule['atoms']) + 1)
-            remapped, used = {}, set()
-            for n, atom in enumerate(molecule['atoms']):
-                m = atom['mapping']
-                if not m:
-                    remapped[n] = next(length)
-                elif m in used:
-                    if not self._ignore:
-                        raise MappingError('mapping in molecules should be unique')
-                    remapped[n] = next(length)
-                    self._info(f'mapping in molecule changed from {m} to {remapped[n]}')
-                else:
-                    remapped[n] = m
-                    used.add(m)
-
-        g = self.__prepare_structure(molecule, remapped)
+        g = self.__prepare_structure(molecule, self._molecule_mapping([x['mapping'] for x in molecule['atoms']]))
         g.meta.update(molecule['meta'])
         return g
 
+    def _molecule_mapping(self, parsed):
+        """
+        Atoms numbers of molecule by index of atom in record.
+
+        :param parsed: list of parsed mapping of atoms. zero for unmapped atoms.
+        """
+        if self.__remap:
+            return {n: k for n, k in enumerate(range(1, len(parsed) + 1))}
+        length = count(max(parsed) + 1)
+        remapped, used = {}, set()
+        for n, m in enumerate(parsed):
+            if not m:
+                remapped[n] = next(length)
+            elif m in used:
+                if not self._ignore:
+                    raise MappingError('mapping in molecules should be unique')
+                remapped[n] = next(length)
+                self._info(f'mapping in molecule changed from {m} to {remapped[n]}')
+            else:
+                remapped[n] = m
+                used.add(m)
+        return remapped
+
     def _convert_molecule(self, molecule, mapping):
         g = object.__new__(self.MoleculeContainer)
         pm = {}
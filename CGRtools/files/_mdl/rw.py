@@ -16,18 +16,32 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
-from base64 import urlsafe_b64encode
+from array import array
+from collections import deque
+from hashlib import sha256
 from io import StringIO, TextIOWrapper
 from itertools import islice
+from logging import warning
+from multiprocessing import Pool
+from os import getpid, makedirs, replace, stat
 from os.path import abspath, join
 from pathlib import Path
-from pickle import dump, load, UnpicklingError
-from sys import platform
+from struct import Struct, error
+from sys import byteorder
 from tempfile import gettempdir
+from typing import Callable, Iterable, Optional, Tuple, Union
+from zlib import crc32
 from .parser import parse_error
+from .._compressed import open_text
 from .stereo import MDLStereo
 
 
+index_signature = b'CGRIDX\x00\x01'
+# signature, file size, modification time in ns, checksum of file head and tail, records boundaries count
+index_header = Struct('<8s4Q')
+cache_dir = None  # temporary directory used by default
+
+
 class MDLReadMeta(type):
     def __call__(cls, *args, **kwargs):
         if kwargs.get('indexable'):
@@ -41,11 +55,9 @@ class MDLReadMeta(type):
 
 class MDLRead(MDLStereo, metaclass=MDLReadMeta):
     def __init__(self, file, **kwargs):
-        if isinstance(file, str):
-            self._file = open(file)
-            self._is_buffer = False
-        elif isinstance(file, Path):
-            self._file = file.open()
+        if isinstance(file, (str, Path)):
+            self._file = open_text(file)
+            self._path = str(file)
             self._is_buffer = False
         elif isinstance(file, (TextIOWrapper, StringIO)):
             self._file = file
@@ -71,35 +83,82 @@ class MDLRead(MDLStereo, metaclass=MDLReadMeta):
 
     def _load_cache(self):
         """
-        Load existing cache or create new. Working only for UNIX-like systems and local files (not buffers).
+        Load existing cache or create new. Cache of changed file is recreated. Buffers are indexed without caching.
         """
-        if platform == 'win32' or self._is_buffer:
+        if self._is_buffer:
+            self._shifts = array('Q', self._get_shifts(self._file))
             return
+        stamp = self.__file_stamp()
         try:
             with open(self.__cache_path, 'rb') as f:
-                self._shifts = load(f)
+                signature, *cached, count = index_header.unpack(f.read(index_header.size))
+                if signature == index_signature and tuple(cached) == stamp:
+                    shifts = array('Q')
+                    shifts.fromfile(f, count)
+                    if byteorder == 'big':
+                        shifts.byteswap()
+                    self._shifts = shifts
+                    return
         except FileNotFoundError:  # cache not found
-            self.reset_index()
+            pass
         except IsADirectoryError as e:
             raise IsADirectoryError(f'Please delete {self.__cache_path} directory') from e
-        except (UnpicklingError, EOFError) as e:  # invalid file. ask user to check it.
-            raise UnpicklingError(f'Invalid cache file {self.__cache_path}. Please delete it') from e
+        except (error, EOFError, ValueError):  # broken cache will be rewritten
+            pass
+        self.reset_index()
 
-    def reset_index(self):
+    def reset_index(self, *, processes: Optional[int] = None, progress: Optional[Callable[[int, int], None]] = None):
         """
-        Create (rewrite) indexation table. Implemented only for object that
-        is a real file (the path to the file is specified) because the external grep utility is used.
+        Create (rewrite) indexation table. Table of files is cached in binary format with file size,
+        modification time and checksum of head and tail of file. See `index_cache_dir`.
+
+        :param processes: number of worker processes for file scanning. By default scan in current process.
+        :param progress: callback receiving number of scanned and total bytes.
         """
-        if platform != 'win32' and not self._is_buffer:
-            self._shifts = self._get_shifts(self._file.name)
-            with open(self.__cache_path, 'wb') as f:
-                dump(self._shifts, f)
-        else:
-            raise self._implement_error
+        if self._is_buffer:
+            self._shifts = array('Q', self._get_shifts(self._file, processes=processes, progress=progress))
+            return
+        stamp = self.__file_stamp()  # file can be changed during indexing. stamp should be older.
+        self._shifts = shifts = array('Q', self._get_shifts(self._file, processes=processes, progress=progress))
+
+        path = self.__cache_path
+        tmp = f'{path}.{getpid()}'
+        if byteorder == 'big':
+            shifts = shifts[:]
+            shifts.byteswap()
+        try:
+            makedirs(cache_dir or gettempdir(), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(index_header.pack(index_signature, *stamp, len(shifts)))
+                shifts.tofile(f)
+            replace(tmp, path)  # atomic for concurrent readers
+        except OSError as e:
+            warning(f'index cache not saved: {e}')
+
+    @staticmethod
+    def index_cache_dir(path: Union[str, Path, None]):
+        """
+        Set directory of indexes cache for all readers.
+
+        :param path: directory path. None for system temporary directory.
+        """
+        global cache_dir
+        cache_dir = None if path is None else str(path)
 
     @property
     def __cache_path(self):
-        return abspath(join(gettempdir(), 'cgrtools_' + urlsafe_b64encode(abspath(self._file.name).encode()).decode()))
+        name = sha256(abspath(self._path).encode()).hexdigest()
+        return abspath(join(cache_dir or gettempdir(), f'cgrtools_{name}.idx'))
+
+    def __file_stamp(self) -> Tuple[int, int, int]:
+        path = self._path
+        st = stat(path)
+        with open(path, 'rb') as f:
+            checksum = crc32(f.read(65536))
+            if st.st_size > 65536:
+                f.seek(max(65536, st.st_size - 65536))
+                checksum = crc32(f.read(), checksum)
+        return st.st_size, st.st_mtime_ns, checksum
 
     def read(self):
         """
@@ -110,7 +169,7 @@ class MDLRead(MDLStereo, metaclass=MDLReadMeta):
         return list(iter(self))
 
     def __iter__(self):
-        return (x for x in self._data if not isinstance(x, parse_error))
+        return (x for x in self._data if x is not None and not isinstance(x, parse_error))
 
     def __next__(self):
         return next(iter(self))
@@ -137,13 +196,14 @@ class MDLRead(MDLStereo, metaclass=MDLReadMeta):
                     return []
                 if step == 1:
                     self.seek(start)
-                    records = [x for x in islice(self._data, stop - start) if not isinstance(x, parse_error)]
+                    records = [x for x in islice(self._data, stop - start)
+                               if x is not None and not isinstance(x, parse_error)]
                 else:
                     records = []
                     for index in range(start, stop, step):
                         self.seek(index)
                         record = next(self._data)
-                        if not isinstance(record, parse_error):
+                        if record is not None and not isinstance(record, parse_error):
                             records.append(record)
                 return records
             else:
@@ -181,10 +241,65 @@ class MDLRead(MDLStereo, metaclass=MDLReadMeta):
         return new_meta
 
     _shifts = None
-    _implement_error = NotImplementedError('Indexable supported in unix-like o.s. and for files stored on disk')
+    _implement_error = NotImplementedError('Indexable supported only for objects created with indexable=True')
 
 
-class _MDLWrite:
+class _BatchWrite:
+    """
+    Writer of text records. Subclasses should implement `_format_record` method returning text of record.
+    """
+    def write(self, data):
+        """
+        Write single record into file.
+        """
+        self._file.write(self._format_record(data))
+
+    def write_many(self, data: Iterable, batch_size: int = 1000, processes: Optional[int] = None):
+        """
+        Write records into file. Records of batch are rendered into one text and written at once.
+
+        :param data: iterable of records
+        :param batch_size: number of records in batch.
+        :param processes: number of worker processes for rendering of batches. By default rendered in current process.
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size should be positive')
+        data = iter(data)
+        batches = iter(lambda: list(islice(data, batch_size)), [])
+        write = self._file.write
+        if processes and processes > 1:
+            task = type(self), {k: v for k, v in self.__dict__.items() if k not in ('_file', 'write', 'write_many')}
+            with Pool(processes) as pool:
+                pending = deque()
+                for batch in batches:
+                    pending.append(pool.apply_async(_format_batch, (*task, batch)))
+                    if len(pending) > 2 * processes:  # limit memory usage
+                        write(pending.popleft().get())
+                while pending:
+                    write(pending.popleft().get())
+        else:
+            format_record = self._format_record
+            for batch in batches:
+                write(''.join([format_record(x) for x in batch]))
+
+    def _format_record(self, data) -> str:
+        raise NotImplementedError
+
+    def _close_writer(self):
+        self.write = self.write_many = self.__write_closed
+
+    @staticmethod
+    def __write_closed(*_, **__):
+        raise ValueError('I/O operation on closed writer')
+
+
+def _format_batch(cls, state, batch):
+    writer = object.__new__(cls)
+    writer.__dict__.update(state)
+    return ''.join([writer._format_record(x) for x in batch])
+
+
+class _MDLWrite(_BatchWrite):
     def __init__(self, file, *, write3d: int = 0, mapping: bool = True, append: bool = False):
         """
         :param write3d: write for Molecules 3D coordinates instead 2D if exists.
@@ -217,7 +332,7 @@ class _MDLWrite:
 
         :param force: force closing of externally opened file or buffer
         """
-        self.write = self.__write_closed
+        self._close_writer()
 
         if not self._is_buffer or force:
             self._file.close()
@@ -228,9 +343,5 @@ class _MDLWrite:
     def __exit__(self, _type, value, traceback):
         self.close()
 
-    @staticmethod
-    def __write_closed(_):
-        raise ValueError('I/O operation on closed writer')
-
 
-__all__ = ['MDLRead', '_MDLWrite']
+__all__ = ['MDLRead', '_BatchWrite', '_MDLWrite']
@@ -43,13 +43,21 @@ class MDLStereo(CGRRead):
                     raise ValueError(f'implicit hydrogen count ({h}) mismatch with '
                                      f'calculated ({hc}) on atom {n}.')
 
+        self._set_stereo(mol, [(mapping[n], mapping[m], s) for n, m, s in molecule['stereo']])
+        return mol
+
+    def _set_stereo(self, mol, stereo):
+        """
+        Set stereo of molecule by wedge bonds.
+
+        :param stereo: list of atoms numbers and wedge direction triples.
+        """
         if self.__ignore_stereo:
-            return mol
+            return
 
         if self.__calc_cis_trans:
             mol.calculate_cis_trans_from_2d()
 
-        stereo = [(mapping[n], mapping[m], s) for n, m, s in molecule['stereo']]
         while stereo:
             fail_stereo = []
             old_stereo = len(stereo)
@@ -73,7 +81,6 @@ class MDLStereo(CGRRead):
                     mol.calculate_cis_trans_from_2d(clean_cache=False)
                 continue
             break
-        return mol
 
 
 __all__ = ['MDLStereo']
@@ -96,10 +96,14 @@ class Element(Core):
         get Element class by its symbol
         """
         try:
-            element = next(x for x in Element.__subclasses__() if x.__name__ == symbol)
-        except StopIteration:
+            elements = cls.__class_cache__['symbols']
+        except KeyError:
+            elements = {x.__name__: x for x in Element.__subclasses__()}
+            cls.__class_cache__['symbols'] = elements
+        try:
+            return elements[symbol]
+        except KeyError:
             raise ValueError(f'Element with symbol "{symbol}" not found')
-        return element
 
     @classmethod
     def from_atomic_number(cls, number: int) -> Type['Element']:
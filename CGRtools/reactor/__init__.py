@@ -16,8 +16,9 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
+from .cache import MatchCache
 from .cgr import CGRReactor
 from .reactor import Reactor
 
 
-__all__ = ['CGRReactor', 'Reactor']
+__all__ = ['CGRReactor', 'MatchCache', 'Reactor']
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from collections import OrderedDict
+from typing import Dict, List
+from ..containers import MoleculeContainer, QueryContainer
+
+
+class MatchCache:
+    """
+    Bounded LRU cache of patterns to molecules matches. Can be shared between reactors.
+
+    Molecules are keyed by canonical SMILES. Matches are stored in canonical atoms order
+    and renumbered to atoms of given molecule on retrieval. Copies of cache (e.g. pickled into worker processes)
+    are empty.
+
+    Key of pattern is calculated once per pattern object. Patterns should not be changed after first use.
+    Key of molecule requires canonicalization of molecule not seen before, thus lookup is not much cheaper than
+    matching of small patterns to small molecules.
+    """
+    def __init__(self, size: int = 10000):
+        """
+        :param size: maximal number of stored pattern-molecule pairs.
+        """
+        if size < 1:
+            raise ValueError('size should be positive')
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__cache = OrderedDict()
+        self.__patterns = {}  # id of pattern to pattern, canonical SMILES and atoms order
+
+    def get_mapping(self, pattern: QueryContainer, molecule: MoleculeContainer, *,
+                    automorphism_filter: bool = True) -> List[Dict[int, int]]:
+        """
+        List of pattern to molecule mappings. See `QueryContainer.get_mapping`.
+        """
+        try:
+            _, p_key, p_order = self.__patterns[id(pattern)]  # pattern kept in dict, thus id can't be reused
+        except KeyError:
+            p_order = pattern.smiles_atoms_order
+            p_key = str(pattern)
+            self.__patterns[id(pattern)] = (pattern, p_key, p_order)
+        order = molecule.smiles_atoms_order
+        key = (p_key, p_order, str(molecule), automorphism_filter)
+        cache = self.__cache
+        try:
+            matches = cache[key]
+        except KeyError:
+            self.misses += 1
+            index = {n: i for i, n in enumerate(order)}
+            matches = [tuple(index[mapping[n]] for n in p_order)
+                       for mapping in pattern.get_mapping(molecule, automorphism_filter=automorphism_filter)]
+            cache[key] = matches
+            if len(cache) > self.size:
+                cache.popitem(last=False)
+        else:
+            self.hits += 1
+            cache.move_to_end(key)
+        return [dict(zip(p_order, (order[i] for i in m))) for m in matches]
+
+    def clear(self):
+        """
+        Remove stored matches and reset counters.
+        """
+        self.__cache.clear()
+        self.__patterns.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.__cache)
+
+    def __getstate__(self):
+        return {'size': self.size}
+
+    def __setstate__(self, state):
+        self.__init__(state['size'])
+
+
+__all__ = ['MatchCache']
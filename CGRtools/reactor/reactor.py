@@ -22,8 +22,9 @@ from functools import reduce
 from itertools import count, permutations, combinations
 from logging import info
 from operator import or_
-from typing import Iterable, List, Iterator
+from typing import Dict, Iterable, List, Iterator, Optional, Tuple
 from .base import BaseReactor
+from .cache import MatchCache
 from .._functions import lazy_product
 from ..containers import QueryContainer, MoleculeContainer, ReactionContainer
 
@@ -39,13 +40,16 @@ class Reactor(BaseReactor):
     possible reactions.
     """
     def __init__(self, template, *, delete_atoms: bool = True, one_shot: bool = True,
-                 polymerise_limit: int = 10, automorphism_filter: bool = True):
+                 polymerise_limit: int = 10, automorphism_filter: bool = True,
+                 match_cache: Optional[MatchCache] = None):
         """
         :param template: CGRtools ReactionContainer
         :param delete_atoms: if True atoms exists in reactants but
                             not exists in products will be removed
         :param one_shot: do only single reaction center then True, else do all possible combinations of reactions.
         :param polymerise_limit: limit of self reactions. Make sense than one_shot = False.
+        :param match_cache: cache of patterns matches. Useful then same molecules reacted many times.
+            Can be shared between reactors.
         """
         reactants, products = template.reactants, template.products
         if not reactants or not products:
@@ -62,21 +66,36 @@ class Reactor(BaseReactor):
         self.__products_atoms = tuple(set(m) for m in products)
         self.__united_products = {x for x in products for x in x}
         self.__automorphism_filter = automorphism_filter
+        self.__match_cache = match_cache
         self.__meta = template.meta.copy()
+        # precompiled matching order of patterns and atoms predicates used in matching of molecules
+        self.__plan = tuple((x._compiled_query, x._compiled_predicates) for x in reactants)
         super().__init__(reduce(or_, reactants), products_, delete_atoms)
 
-    def __call__(self, structures: Iterable[MoleculeContainer]):
+    def __call__(self, structures: Iterable[MoleculeContainer], *, fixed_order: bool = False):
+        """
+        :param structures: reactants
+        :param fixed_order: match structures to template reactants in given order only.
+            Structures exceeding template reactants count are not reacted.
+        """
         if any(not isinstance(structure, MoleculeContainer) for structure in structures):
             raise TypeError('only list of Molecules possible')
 
         len_patterns = len(self.__patterns)
         structures = self.__remap(structures)
         s_nums = set(range(len(structures)))
+        if fixed_order:
+            if len(structures) < len_patterns:
+                return
+            orders = [tuple(range(len_patterns))]
+        else:
+            orders = permutations(s_nums, len_patterns)
+        matches = {}  # patterns matches shared between permutations of structures
         if self.__one_shot:
-            for chosen in permutations(s_nums, len_patterns):
+            for chosen in orders:
                 ignored = [structures[x] for x in s_nums.difference(chosen)]
                 chosen = [structures[x] for x in chosen]
-                for new in self.__single_stage(chosen, {x for x in ignored for x in x}):
+                for new in self.__single_stage(chosen, {x for x in ignored for x in x}, matches):
                     r = ReactionContainer([x.copy() for x in structures], new + [x.copy() for x in ignored],
                                           meta=self.__meta)
                     if len(new) > 1:  # try to keep salts
@@ -84,12 +103,12 @@ class Reactor(BaseReactor):
                     yield r
         else:
             queue = deque(([structures[x] for x in chosen], [structures[x] for x in s_nums.difference(chosen)], 0)
-                          for chosen in permutations(s_nums, len_patterns))
+                          for chosen in orders)
             seen = set()
             while queue:
                 chosen, ignored, depth = queue.popleft()
                 depth += 1
-                for new in self.__single_stage(chosen, {x for x in ignored for x in x}):
+                for new in self.__single_stage(chosen, {x for x in ignored for x in x}, matches):
                     r = ReactionContainer([x.copy() for x in structures], new + [x.copy() for x in ignored],
                                           meta=self.__meta)
                     if len(new) > 1:
@@ -118,14 +137,20 @@ class Reactor(BaseReactor):
                                         queue.append((ch, [*prod[:i], *prod[i + 1:]], depth))
                     yield r
 
-    def __single_stage(self, chosen, ignored) -> Iterator[List[MoleculeContainer]]:
+    @property
+    def patterns(self) -> Tuple[QueryContainer, ...]:
+        """
+        Reactants patterns of template.
+        """
+        return tuple(self.__patterns)
+
+    def __single_stage(self, chosen, ignored, matches) -> Iterator[List[MoleculeContainer]]:
         max_ignored_number = max(ignored, default=0)
         united_chosen = reduce(or_, chosen)
         split = len(self.__products_atoms) > 1
-        for match in lazy_product(*(x.get_mapping(y, automorphism_filter=self.__automorphism_filter) for x, y in
-                                    zip(self.__patterns, chosen))):
-            mapping = match[0]
-            for m in match[1:]:
+        for match in lazy_product(*(self.__get_mapping(n, x, matches) for n, x in enumerate(chosen))):
+            mapping = {}
+            for m in match:
                 mapping.update(m)
             new = self._patcher(united_chosen, mapping)
             collision = set(new).intersection(ignored)
@@ -137,6 +162,23 @@ class Reactor(BaseReactor):
             else:
                 yield [new]
 
+    def __get_mapping(self, pattern: int, structure: MoleculeContainer, matches) -> Iterable[Dict[int, int]]:
+        """
+        Matches of pattern to structure. Matches found once and reused for all permutations of structures.
+        """
+        key = (pattern, id(structure))
+        try:
+            return matches[key][1]
+        except KeyError:
+            if self.__match_cache is not None:
+                mapper = self.__match_cache.get_mapping(self.__patterns[pattern], structure,
+                                                        automorphism_filter=self.__automorphism_filter)
+            else:
+                mapper = _Matches(self.__patterns[pattern].get_mapping(structure,
+                                                                       automorphism_filter=self.__automorphism_filter))
+            matches[key] = (structure, mapper)  # keep structure alive for id uniqueness
+            return mapper
+
     @staticmethod
     def __remap(structures) -> List[MoleculeContainer]:
         checked = []
@@ -155,7 +197,9 @@ class Reactor(BaseReactor):
     def __getstate__(self):
         return {'patterns': self.__patterns, 'meta': self.__meta, 'products_atoms': self.__products_atoms,
                 'polymerise_limit': self.__polymerise_limit, 'one_shot': self.__one_shot,
-                'automorphism_filter': self.__automorphism_filter, **super().__getstate__()}
+                'automorphism_filter': self.__automorphism_filter, 'plan': tuple(x for x, _ in self.__plan),
+                'predicates': tuple(x for _, x in self.__plan),
+                'match_cache': self.__match_cache, **super().__getstate__()}
 
     def __setstate__(self, state):
         if 'split' in state:
@@ -166,7 +210,44 @@ class Reactor(BaseReactor):
         self.__polymerise_limit = state['polymerise_limit']
         self.__products_atoms = state['products_atoms']
         self.__automorphism_filter = state['automorphism_filter']
+        self.__match_cache = state.get('match_cache')
+        if 'predicates' in state:  # restore compiled patterns
+            self.__plan = plan = tuple(zip(state['plan'], state['predicates']))
+            for x, (q, p) in zip(self.__patterns, plan):
+                x.__dict__['_compiled_query'] = q
+                x.__dict__['_compiled_predicates'] = p
+        else:
+            self.__plan = tuple((x._compiled_query, x._compiled_predicates) for x in self.__patterns)
         super().__setstate__(state)
 
 
+class _Matches:
+    """
+    Lazy evaluated and cached matches of pattern. Can be iterated many times.
+    """
+    __slots__ = ('__mapper', '__cache')
+
+    def __init__(self, mapper: Iterator[Dict[int, int]]):
+        self.__mapper = mapper
+        self.__cache = []
+
+    def __iter__(self) -> Iterator[Dict[int, int]]:
+        cache = self.__cache
+        i = 0
+        while True:
+            if i < len(cache):
+                yield cache[i]
+            elif self.__mapper is None:
+                return
+            else:
+                try:
+                    x = next(self.__mapper)
+                except StopIteration:
+                    self.__mapper = None
+                    return
+                cache.append(x)
+                yield x
+            i += 1
+
+
 __all__ = ['Reactor']
@@ -17,11 +17,16 @@
 #  along with this program; if not, see <https://www.gnu.org/licenses/>.
 #
 from importlib.util import find_spec
+from .dedup import are_isomorphic, molecule_key, DedupSet
 from .functional_groups import functional_groups
 from .grid import grid_depict
+from .matching import TemplateSet
+from .parallel import canonical_smiles_batch, enumerate_library, ParallelReader
+from .screening import SubstructureIndex
 
 
-__all__ = ['functional_groups', 'grid_depict']
+__all__ = ['are_isomorphic', 'molecule_key', 'DedupSet', 'functional_groups', 'grid_depict', 'SubstructureIndex',
+           'TemplateSet', 'canonical_smiles_batch', 'enumerate_library', 'ParallelReader']
 
 
 if find_spec('rdkit'):
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+from .._functions import tuple_hash
+from ..algorithms.isomorphism import Isomorphism
+from ..containers import MoleculeContainer
+
+
+def _counts(molecule: MoleculeContainer) -> tuple:
+    """
+    Atoms, bonds, rings and stereo marks counts.
+    """
+    return (len(molecule), molecule.bonds_count, molecule.rings_count, len(molecule._atoms_stereo),
+            len(molecule._allenes_stereo), len(molecule._cis_trans_stereo))
+
+
+def _atoms_histogram(molecule: MoleculeContainer) -> Counter:
+    return Counter(hash(a) for a in molecule._atoms.values())
+
+
+def _bonds_histogram(molecule: MoleculeContainer) -> Counter:
+    return Counter(b.order for _, _, b in molecule.bonds())
+
+
+def _invariants(molecule: MoleculeContainer) -> tuple:
+    """
+    Cheap invariants: counts, atoms and bonds orders histograms.
+    """
+    return (_counts(molecule), tuple(sorted(_atoms_histogram(molecule).items())),
+            tuple(sorted(_bonds_histogram(molecule).items())))
+
+
+def _morgan_invariant(molecule: MoleculeContainer) -> int:
+    """
+    Hash of atoms sorted by Morgan weights.
+    """
+    atoms = molecule._atoms
+    return tuple_hash(tuple(sorted((w, hash(atoms[n])) for n, w in molecule.atoms_order.items())))
+
+
+def _is_equal(a: MoleculeContainer, b: MoleculeContainer) -> bool:
+    """
+    Mapping search of molecules with equal invariants.
+
+    Search without optimization used if optimized search failed. Stereo molecules are rechecked for all symmetric
+    images of stereo atoms and their neighbors: found mapping can mismatch stereo, but symmetric one can match.
+    """
+    if next(a.get_mapping(b, fallback=True, symmetry_breaking=True), None) is not None:
+        return True
+    elif a._atoms_stereo or a._allenes_stereo or a._cis_trans_stereo:
+        mapping = next(Isomorphism.get_mapping(a, b, fallback=True, symmetry_breaking=True), None)  # without stereo
+        if mapping is None:
+            return False
+        atoms = a._stereo_mapping_atoms
+        generators = a._automorphism_group[0]
+        seen = {atoms}
+        stack = [atoms]
+        while stack:
+            image = stack.pop()
+            if a._is_stereo_mapping(b, {**mapping, **{n: mapping[m] for n, m in zip(atoms, image)}}):
+                return True
+            for g in generators:
+                x = tuple(g[n] for n in image)
+                if x not in seen:
+                    seen.add(x)
+                    stack.append(x)
+    return False
+
+
+def molecule_key(molecule: MoleculeContainer) -> Tuple[tuple, int]:
+    """
+    Hashable key of molecule. Isomorphic molecules have equal keys. Not isomorphic molecules can rarely have equal keys.
+    """
+    if not isinstance(molecule, MoleculeContainer):
+        raise TypeError('MoleculeContainer expected')
+    return _invariants(molecule), _morgan_invariant(molecule)
+
+
+def are_isomorphic(a: MoleculeContainer, b: MoleculeContainer) -> bool:
+    """
+    Test molecules are same structures including stereo.
+
+    Invariants compared from cheap to expensive: counts and histograms of atoms and bonds, Morgan weights.
+    Mapping search performed only for molecules with equal invariants.
+    """
+    if not isinstance(a, MoleculeContainer) or not isinstance(b, MoleculeContainer):
+        raise TypeError('MoleculeContainer expected')
+    if len(a) != len(b) or a.bonds_count != b.bonds_count or _counts(a) != _counts(b):
+        return False
+    if _atoms_histogram(a) != _atoms_histogram(b) or _bonds_histogram(a) != _bonds_histogram(b):
+        return False
+    if _morgan_invariant(a) != _morgan_invariant(b):
+        return False
+    return _is_equal(a, b)
+
+
+class DedupSet:
+    """
+    Set of unique molecules.
+
+    Molecules grouped by cheap invariants. Morgan weights and mapping search are used only for molecules with equal
+    invariants.
+    """
+    def __init__(self, molecules: Iterable[MoleculeContainer] = ()):
+        self._buckets: Dict[tuple, List[list]] = {}  # pairs of molecule and Morgan invariant calculated on demand
+        self._size = 0
+        for m in molecules:
+            self.add(m)
+
+    def add(self, molecule: MoleculeContainer) -> bool:
+        """
+        Add molecule to set.
+
+        :return: True if molecule is new.
+        """
+        if not isinstance(molecule, MoleculeContainer):
+            raise TypeError('MoleculeContainer expected')
+        key = _invariants(molecule)
+        try:
+            bucket = self._buckets[key]
+        except KeyError:
+            self._buckets[key] = [[molecule, None]]
+        else:
+            morgan = _morgan_invariant(molecule)
+            if self.__find(bucket, molecule, morgan):
+                return False
+            bucket.append([molecule, morgan])
+        self._size += 1
+        return True
+
+    def __contains__(self, molecule: MoleculeContainer):
+        if not isinstance(molecule, MoleculeContainer):
+            return False
+        try:
+            bucket = self._buckets[_invariants(molecule)]
+        except KeyError:
+            return False
+        return self.__find(bucket, molecule, _morgan_invariant(molecule))
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for bucket in self._buckets.values():
+            for m, _ in bucket:
+                yield m
+
+    @staticmethod
+    def __find(bucket, molecule, morgan):
+        for pair in bucket:
+            m, m_morgan = pair
+            if m_morgan is None:
+                pair[1] = m_morgan = _morgan_invariant(m)
+            if morgan == m_morgan and _is_equal(m, molecule):
+                return True
+        return False
+
+    def __getstate__(self):
+        return {'molecules': list(self)}
+
+    def __setstate__(self, state):
+        self.__init__(state['molecules'])
+
+
+__all__ = ['molecule_key', 'are_isomorphic', 'DedupSet']
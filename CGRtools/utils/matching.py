@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Tuple
+from ..containers import MoleculeContainer, QueryContainer
+
+
+class _Node:
+    __slots__ = ('back', 'atom', 'atom_index', 'bond', 'closures', 'children', 'terminals')
+
+    def __init__(self, back, atom, atom_index, bond, closures):
+        self.back = back  # depth of atom in path to which current atom bonded
+        self.atom = atom
+        self.atom_index = atom_index  # index of unique atom predicate
+        self.bond = bond
+        self.closures = closures  # pairs of depth of atom in path and bond of ring closure
+        self.children = {}
+        self.terminals = []  # pairs of pattern index and pattern atoms in path order
+
+
+class TemplateSet:
+    """
+    Collection of query patterns matched against molecule in one pass.
+
+    Precompiled matching plans of patterns merged into prefix tree of atoms and bonds predicates.
+    Patterns with common beginning of plan share search of this part, equal atoms predicates checked once per
+    molecule atom. Patterns with stereo or from several components matched separately.
+    """
+    def __init__(self, patterns: Iterable[QueryContainer] = ()):
+        self._patterns: List[QueryContainer] = []
+        self._root: Dict[tuple, _Node] = {}
+        self._atoms: Dict[tuple, int] = {}  # unique atoms predicates
+        self._separate: List[int] = []  # patterns not merged into tree
+        for p in patterns:
+            self.add(p)
+
+    def add(self, pattern: QueryContainer) -> int:
+        """
+        Add pattern to set.
+
+        :return: index of pattern
+        """
+        if not isinstance(pattern, QueryContainer):
+            raise TypeError('QueryContainer expected')
+        index = len(self._patterns)
+        self._patterns.append(pattern)
+
+        components, closures = pattern._compiled_predicates
+        if len(components) != 1 or pattern._atoms_stereo or pattern._allenes_stereo or pattern._cis_trans_stereo:
+            self._separate.append(index)
+            return index
+
+        linear = components[0]
+        depths = {x[0]: n for n, x in enumerate(linear)}
+        start, atom = linear[0]
+        key = atom.key
+        try:
+            node = self._root[key]
+        except KeyError:
+            node = _Node(None, atom, self.__atom_index(key), None, ())
+            self._root[key] = node
+        for n, back, atom, bond in linear[1:]:
+            c = tuple(sorted((depths[m], b) for m, b in closures[n]))
+            key = (depths[back], atom.key, bond.order, tuple((d, b.order) for d, b in c))
+            try:
+                node = node.children[key]
+            except KeyError:
+                child = _Node(depths[back], atom, self.__atom_index(key[1]), bond, c)
+                node.children[key] = child
+                node = child
+        node.terminals.append((index, tuple(x[0] for x in linear)))
+        return index
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def __iter__(self):
+        return iter(self._patterns)
+
+    def __getitem__(self, item):
+        return self._patterns[item]
+
+    def get_mapping(self, molecule: MoleculeContainer, *,
+                    automorphism_filter: bool = True) -> Iterator[Tuple[int, Dict[int, int]]]:
+        """
+        Pairs of pattern index and pattern to molecule mapping.
+        Matches of different patterns are interleaved.
+
+        :param automorphism_filter: Skip matches to same atoms.
+        """
+        if not isinstance(molecule, MoleculeContainer):
+            raise TypeError('MoleculeContainer expected')
+        o_atoms = molecule._atoms_features
+        o_bonds = molecule._bonds
+        groups = molecule.atoms_order
+        equal_cache = [{} for _ in self._atoms]
+        seen = defaultdict(set)
+
+        stack = []
+        for n, o_atom in o_atoms.items():
+            for node in self._root.values():
+                eqs = equal_cache[node.atom_index]
+                try:
+                    eq = eqs[n]
+                except KeyError:
+                    eq = eqs[n] = node.atom == o_atom
+                if eq:
+                    stack.append((node, (n,)))
+
+        while stack:
+            node, path = stack.pop()
+            for index, order in node.terminals:
+                if automorphism_filter:
+                    atoms = frozenset(path)
+                    if atoms in seen[index]:
+                        continue
+                    seen[index].add(atoms)
+                yield index, dict(zip(order, path))
+
+            for child in node.children.values():
+                eqs = equal_cache[child.atom_index]
+                s_bond = child.bond
+                s_atom = child.atom
+                closures = child.closures
+                uniq = set()
+                for o_n, o_bond in o_bonds[path[child.back]].items():
+                    if o_n not in path and s_bond == o_bond and groups[o_n] not in uniq:
+                        uniq.add(groups[o_n])
+                        try:
+                            eq = eqs[o_n]
+                        except KeyError:
+                            eq = eqs[o_n] = s_atom == o_atoms[o_n]
+                        if eq and all(bond == o_bonds[path[d]].get(o_n) for d, bond in closures):
+                            stack.append((child, path + (o_n,)))
+
+        patterns = self._patterns
+        for index in self._separate:
+            for mapping in patterns[index].get_mapping(molecule, automorphism_filter=automorphism_filter):
+                yield index, mapping
+
+    def search(self, molecule: MoleculeContainer) -> List[int]:
+        """
+        Sorted indices of patterns matched molecule.
+        """
+        return sorted({n for n, _ in self.get_mapping(molecule)})
+
+    def __atom_index(self, key):
+        try:
+            return self._atoms[key]
+        except KeyError:
+            index = self._atoms[key] = len(self._atoms)
+            return index
+
+    def __getstate__(self):
+        return {'patterns': self._patterns}
+
+    def __setstate__(self, state):
+        self.__init__(state['patterns'])
+
+
+__all__ = ['TemplateSet']
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from collections import deque
+from io import BytesIO, TextIOWrapper
+from itertools import islice, product
+from multiprocessing import Pool
+from os import cpu_count
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Type, Union
+from ..containers import MoleculeContainer, ReactionContainer
+from ..files import SMILESRead
+from ..files._compressed import open_binary
+from ..files._mdl import stream_size
+from ..reactor import Reactor
+
+
+_library = None  # reactor and reagents of worker process
+
+
+def canonical_smiles_batch(molecules: Iterable[MoleculeContainer], processes: Optional[int] = None,
+                           chunksize: int = 100) -> Iterator[str]:
+    """
+    Canonical SMILES of molecules calculated in worker processes. Strings are yielded in order of molecules.
+
+    Molecules are transferred to workers in packed form. See `MoleculeContainer.pack`.
+    Molecules are read and packed only as results are consumed, twice processes count chunks are in flight.
+
+    :param processes: number of worker processes. By default equal to CPU count.
+    :param chunksize: number of molecules sent to worker at once.
+    """
+    if chunksize < 1:
+        raise ValueError('chunksize should be positive')
+    packed = (m.pack() for m in molecules)
+    chunks = iter(lambda: list(islice(packed, chunksize)), [])
+    with Pool(processes) as pool:
+        for results in _ordered_map(pool, _canonical_smiles, chunks, 2 * (processes or cpu_count())):
+            yield from results
+
+
+def _canonical_smiles(chunk: List[bytes]) -> List[str]:
+    return [str(MoleculeContainer.unpack(data, frozen=True)) for data in chunk]
+
+
+def enumerate_library(reactor: Reactor, reagent_lists: Sequence[Sequence[MoleculeContainer]],
+                      processes: Optional[int] = None, dedup: bool = True, limit: Optional[int] = None, *,
+                      smiles: bool = False, chunksize: int = 1000) -> Iterator[Union[ReactionContainer, str]]:
+    """
+    Products of reactor applied to all combinations of reagents. Combinations are processed in worker processes.
+    Results are yielded in order of combinations.
+
+    Each list of reagents corresponds to the reactant pattern of template with the same index,
+    reagents are reacted in this order only. Reagents not matched to pattern are skipped.
+
+    :param reactor: Reactor object
+    :param reagent_lists: list of reagents for each pattern of template.
+    :param processes: number of worker processes. By default equal to CPU count.
+    :param dedup: skip already generated products. Products compared by canonical SMILES.
+    :param limit: maximal number of yielded products.
+    :param smiles: yield SMILES of products instead of reactions.
+    :param chunksize: number of combinations sent to worker at once.
+    """
+    if chunksize < 1:
+        raise ValueError('chunksize should be positive')
+    patterns = reactor.patterns
+    if len(reagent_lists) != len(patterns):
+        raise ValueError('reagents lists count should be equal to template reactants count')
+    reagent_lists = [[m for m in reagents if pattern.is_substructure(m)]
+                     for pattern, reagents in zip(patterns, reagent_lists)]
+    if not all(reagent_lists) or limit is not None and limit < 1:
+        return
+
+    combinations = product(*(range(len(x)) for x in reagent_lists))
+    chunks = iter(lambda: list(islice(combinations, chunksize)), [])
+    seen = set()
+    found = 0
+    with Pool(processes, _init_library, (reactor, reagent_lists, smiles, dedup)) as pool:
+        for results in _ordered_map(pool, _enumerate_chunk, chunks, 2 * (processes or cpu_count())):
+            for key, x in results:
+                if dedup:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                yield x
+                found += 1
+                if found == limit:
+                    return
+
+
+def _ordered_map(pool, func, tasks, size):
+    """
+    Results of tasks in order. Only given number of tasks are submitted at once.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) > size:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _init_library(reactor, reagent_lists, smiles, dedup):
+    global _library
+    _library = reactor, reagent_lists, smiles, dedup
+
+
+def _enumerate_chunk(chunk):
+    reactor, reagent_lists, smiles, dedup = _library
+    out = []
+    seen = set()
+    for combination in chunk:
+        for r in reactor([x[i] for x, i in zip(reagent_lists, combination)], fixed_order=True):
+            key = '.'.join(sorted(str(x) for x in r.products))
+            if dedup:
+                if key in seen:
+                    continue
+                seen.add(key)
+            out.append((key, key if smiles else r))
+    return out
+
+
+class ParallelReader:
+    """
+    Records of SDF, RDF or SMILES file parsed in worker processes.
+
+    File is split into chunks of records by offsets table of indexable readers (see `SDFRead._get_shifts`) or by
+    lines for SMILES files. Each chunk is parsed by separate reader object in worker process.
+    Records with errors are skipped.
+    """
+    def __init__(self, reader_cls: Type, path: Union[str, Path], processes: Optional[int] = None,
+                 ordered: bool = True, *, chunksize: int = 100, pack: bool = False, **kwargs):
+        """
+        :param reader_cls: SDFRead, RDFRead or SMILESRead class
+        :param path: file path
+        :param processes: number of worker processes. By default equal to CPU count.
+        :param ordered: yield records in order of file. Otherwise in order of chunks parsing completion.
+        :param chunksize: number of records in chunk.
+        :param pack: yield packed containers bytes instead of containers. See `MoleculeContainer.pack`.
+        :param kwargs: reader options.
+        """
+        if chunksize < 1:
+            raise ValueError('chunksize should be positive')
+        self._reader_cls = reader_cls
+        self._path = path = str(path)
+        self._processes = processes
+        self._ordered = ordered
+        self._pack = pack
+        self._kwargs = kwargs
+
+        if hasattr(reader_cls, '_get_shifts'):
+            with open_binary(path) as file:
+                shifts = reader_cls._get_shifts(file)
+                if len(shifts) == 1:  # single record file without records separators
+                    shifts = [0, stream_size(file)]
+                    self._prefix = 0
+                else:
+                    self._prefix = shifts[0]  # file header
+            bounds = shifts[::chunksize]
+            if bounds[-1] != shifts[-1]:
+                bounds.append(shifts[-1])
+        elif issubclass(reader_cls, SMILESRead):
+            self._prefix = 0
+            bounds = self._lines_chunks(chunksize)
+        else:
+            raise TypeError('SDFRead, RDFRead or SMILESRead expected')
+        self._bounds = bounds
+
+    def __iter__(self) -> Iterator:
+        tasks = ((self._reader_cls, self._path, self._prefix, start, stop, self._kwargs, self._pack)
+                 for start, stop in zip(self._bounds, self._bounds[1:]))
+        with Pool(self._processes) as pool:
+            for chunk in (pool.imap if self._ordered else pool.imap_unordered)(_parse_chunk, tasks):
+                yield from chunk
+
+    def __len__(self):
+        """
+        Number of chunks.
+        """
+        return len(self._bounds) - 1
+
+    def _lines_chunks(self, chunksize: int) -> List[int]:
+        with open_binary(self._path) as file:
+            if self._kwargs.get('header') is True:  # header should be parsed once
+                self._kwargs['header'] = file.readline().decode().split()[1:]
+            bounds = [file.tell()]
+            count = 0
+            for line in file:
+                count += 1
+                if count == chunksize:
+                    bounds.append(file.tell())
+                    count = 0
+            if count:
+                bounds.append(file.tell())
+        return bounds
+
+
+def _parse_chunk(task):
+    reader_cls, path, prefix, start, stop, kwargs, pack = task
+    with open_binary(path) as file:
+        data = file.read(prefix)
+        file.seek(start)
+        data += file.read(stop - start)
+    with reader_cls(TextIOWrapper(BytesIO(data)), **kwargs) as reader:
+        if pack:
+            return [x.pack() for x in reader]
+        return list(reader)
+
+
+__all__ = ['canonical_smiles_batch', 'enumerate_library', 'ParallelReader']
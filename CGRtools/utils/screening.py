@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from typing import Dict, Iterable, Iterator, List, Tuple
+from ..containers import MoleculeContainer, QueryContainer
+
+
+class SubstructureIndex:
+    """
+    Molecules collection with fingerprints screening for substructure search.
+
+    Full mapping search is performed only for molecules which fingerprints contain all query fingerprint bits.
+    """
+    def __init__(self, molecules: Iterable[MoleculeContainer] = ()):
+        self._molecules: List[MoleculeContainer] = []
+        self._fingerprints: List[int] = []
+        for m in molecules:
+            self.add(m)
+
+    def add(self, molecule: MoleculeContainer) -> int:
+        """
+        Add molecule to index.
+
+        :return: index of molecule
+        """
+        if not isinstance(molecule, MoleculeContainer):
+            raise TypeError('MoleculeContainer expected')
+        self._molecules.append(molecule)
+        self._fingerprints.append(molecule.screening_fingerprint)
+        return len(self._molecules) - 1
+
+    def __len__(self):
+        return len(self._molecules)
+
+    def __iter__(self):
+        return iter(self._molecules)
+
+    def __getitem__(self, item):
+        return self._molecules[item]
+
+    def screen(self, query: QueryContainer) -> Iterator[int]:
+        """
+        Indices of molecules passed fingerprint screening.
+        """
+        if not isinstance(query, QueryContainer):
+            raise TypeError('QueryContainer expected')
+        mask = query.screening_fingerprint
+        return (n for n, fp in enumerate(self._fingerprints) if fp & mask == mask)
+
+    def search(self, query: QueryContainer) -> Iterator[int]:
+        """
+        Indices of molecules containing query substructure.
+        """
+        molecules = self._molecules
+        return (n for n in self.screen(query) if query.is_substructure(molecules[n]))
+
+    def get_mapping(self, query: QueryContainer, **kwargs) -> Iterator[Tuple[int, Dict[int, int]]]:
+        """
+        Pairs of molecule index and query to molecule mapping.
+
+        :param kwargs: see `QueryContainer.get_mapping` options.
+        """
+        molecules = self._molecules
+        for n in self.screen(query):
+            for mapping in query.get_mapping(molecules[n], **kwargs):
+                yield n, mapping
+
+    def __getstate__(self):
+        return {'molecules': self._molecules, 'fingerprints': self._fingerprints}
+
+    def __setstate__(self, state):
+        self._molecules = state['molecules']
+        self._fingerprints = state['fingerprints']
+
+
+__all__ = ['SubstructureIndex']
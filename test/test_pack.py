@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from CGRtools.containers import CGRContainer, MoleculeContainer
+from pytest import raises
+
+
+def _bonds(cgr):
+    return {n: {m: (b.order, b.p_order) for m, b in ms.items()} for n, ms in cgr._bonds.items()}
+
+
+def test_cgr_many_bonds():
+    cgr = CGRContainer()
+    for _ in range(3000):
+        cgr.add_atom('C')
+    for n in range(1, 3000):
+        cgr.add_bond(n, n + 1, 1)
+    for n in range(1, 2999):
+        cgr.add_bond(n, n + 2, 2)
+    assert cgr.bonds_count > 4095
+
+    unpacked = CGRContainer.unpack(cgr.pack())
+    assert list(unpacked) == list(cgr)
+    assert _bonds(unpacked) == _bonds(cgr)
+
+
+def test_molecule_many_bonds():
+    mol = MoleculeContainer()
+    for _ in range(3000):
+        mol.add_atom('C')
+    for n in range(1, 3000):
+        mol.add_bond(n, n + 1, 1)
+    for n in range(1, 2999):
+        mol.add_bond(n, n + 2, 1)
+    assert mol.bonds_count > 4095
+
+    with raises(ValueError):
+        mol.pack(version=1)
+    unpacked = MoleculeContainer.unpack(mol.pack())
+    assert list(unpacked) == list(mol)
+    assert {n: set(ms) for n, ms in unpacked._bonds.items()} == {n: set(ms) for n, ms in mol._bonds.items()}
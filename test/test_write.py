@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2021 Ramil Nugmanov <nougmanoff@protonmail.com>
+#  This file is part of CGRtools.
+#
+#  CGRtools is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, see <https://www.gnu.org/licenses/>.
+#
+from CGRtools import smiles
+from CGRtools.files import SMILESRead, SMILESWrite
+from io import StringIO
+from pytest import raises
+
+
+def _molecules(metas):
+    out = []
+    for meta in metas:
+        m = smiles('CCO')
+        m.meta.update(meta)
+        out.append(m)
+    return out
+
+
+def test_smiles_write_many_uneven_meta():
+    metas = [{'id': '1', 'activity': '5.2'}, {'id': '2'}, {}, {'id': '4', 'activity': '7', 'extra': 'x'}]
+    for processes in (None, 2):
+        file = StringIO()
+        with SMILESWrite(file, header=['id', 'activity']) as w:
+            w.write_many(_molecules(metas), batch_size=3, processes=processes)
+        file.seek(0)
+        with SMILESRead(file, header=True) as r:
+            assert [m.meta for m in r] == [{'id': '1', 'activity': '5.2'}, {'id': '2'}, {},
+                                           {'id': '4', 'activity': '7'}]
+
+
+def test_smiles_write_many_missing_meta():
+    file = StringIO()
+    with SMILESWrite(file, header=['id', 'activity']) as w:
+        with raises(ValueError):
+            w.write_many(_molecules([{'id': '1', 'activity': '2'}, {'activity': '3'}]))